@@ -0,0 +1,391 @@
+"""
+This file is part of spil_ui, a UI using SPIL, The Simple Pipeline Lib.
+
+(C) copyright 2019-2024 Michael Haussmann, spil@xeo.info
+
+SPIL_UI is free software and is distributed under the MIT License. See LICENSE file.
+"""
+from __future__ import annotations
+from typing import Callable, Dict, List, Optional
+
+usage = """
+Headless benchmark of the Browser and Bar search paths.
+
+Generates a synthetic tree from the Sid templates (see synthetic_tree.py), opens the Browser and the Bar
+with the Qt "offscreen" platform, and measures, for each search:
+- time to first column: the first entity column results
+- time to full table: the entity columns are listed, the version table is listed,
+  and the values of the visible rows are loaded
+- the number of Finder.find calls, and their cumulated time
+- the number of file system calls (scandir, listdir, stat, lstat) below the project root
+- the peak Python memory (tracemalloc, in a separate pass, as it slows down the searches)
+
+Each search is run "cold" (caches cleared) and "warm" (caches filled by the cold run).
+
+The tree is served from memory (see fake_fs.py), for 10^5 - 10^6 files,
+or written to disk under the project root with --write (and removed afterwards, unless --keep).
+An artificial latency can be added to each file system call, to emulate a network file system.
+
+For the Bar, the time from a completion request to the updated completer is measured,
+and the Finder calls of typing a Sid character by character.
+
+Usage (from the repository root, with the spil configuration in the python path):
+    python benchmarks/bench_browser.py --files 500000 --latency 2 --json results.json
+    python benchmarks/bench_browser.py --write --files 5000
+"""
+import os
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import argparse
+import contextlib
+import json
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from qtpy import QtCore, QtWidgets
+
+import spil
+
+from synthetic_tree import TreeSize, generate, paths, project_root, remove, sid_strings
+from fake_fs import FakeFS
+
+timeout = 60  # seconds, per measure
+typing_interval = 0.08  # seconds between key strokes, when typing in the Bar
+
+
+class FindCounter(object):
+    """
+    Counts the calls to FindInAll.find, and their cumulated time (including result iteration).
+    Thread safe enough for counting: searches run in worker threads.
+    """
+
+    def __init__(self, fs: Optional[FakeFS] = None):
+        self.calls = 0
+        self.seconds = 0.0
+        self.fs = fs
+
+    def reset(self):
+        self.calls = 0
+        self.seconds = 0.0
+        if self.fs:
+            self.fs.calls.clear()
+
+    @property
+    def fs_calls(self) -> int:
+        return sum(self.fs.calls.values()) if self.fs else 0
+
+    @contextlib.contextmanager
+    def patch(self):
+        find = spil.FindInAll.find
+        counter = self
+
+        def counted_find(finder, *args, **kwargs):
+            counter.calls += 1
+            start = time.perf_counter()
+            try:
+                yield from find(finder, *args, **kwargs)
+            finally:
+                counter.seconds += time.perf_counter() - start
+
+        spil.FindInAll.find = counted_find
+        try:
+            yield self
+        finally:
+            spil.FindInAll.find = find
+
+
+def wait(app: QtWidgets.QApplication, condition: Callable[[], bool]) -> bool:
+    """
+    Processes Qt events until the condition is True, or the timeout.
+    """
+    end = time.perf_counter() + timeout
+    while not condition():
+        if time.perf_counter() > end:
+            return False
+        app.processEvents(QtCore.QEventLoop.AllEvents, 10)
+        QtCore.QThread.msleep(1)
+    return True
+
+
+def pause(app: QtWidgets.QApplication, seconds: float) -> None:
+    """
+    Processes Qt events for the given time.
+    """
+    end = time.perf_counter() + seconds
+    wait(app, lambda: time.perf_counter() > end)
+
+
+def clear_caches():
+    from spil_ui.browser.ui.browser import entity_cache
+    from spil_ui.util.stat_cache import stat_cache
+
+    entity_cache.clear()
+    stat_cache.clear()
+
+
+def bench_browser_search(app, browser, search: str, counter: FindCounter) -> Dict:
+    """
+    Launches a search in the Browser, and measures it until the table is filled.
+    """
+    marks = {}
+    start = time.perf_counter()
+
+    def mark(name):
+        marks.setdefault(name, time.perf_counter() - start)
+
+    connections = [
+        (browser.entity_search.found, lambda *args: mark("first_column")),
+        (browser.entity_search.finished, lambda: mark("entities")),
+        (browser.version_search.finished, lambda: mark("versions")),
+    ]
+    for signal, slot in connections:
+        signal.connect(slot)
+
+    counter.reset()
+    start = time.perf_counter()
+    browser.launch_search(search)
+
+    def table_done():
+        if "entities" not in marks:
+            return False
+        if browser.versions_after_entities and "versions" not in marks:
+            return False
+        model = browser.version_model
+        return not model.running and not model.requested
+
+    completed = wait(app, table_done)
+    mark("full_table")
+
+    for signal, slot in connections:
+        signal.disconnect(slot)
+
+    return {
+        "search": search,
+        "completed": completed,
+        "first_column": marks.get("first_column"),
+        "full_table": marks["full_table"],
+        "columns": len(browser.sid_widgets),
+        "rows": browser.version_model.rowCount(),
+        "find_calls": counter.calls,
+        "find_seconds": counter.seconds,
+        "fs_calls": counter.fs_calls,
+    }
+
+
+def bench_browser(app, searches: List[str], runs: int, counter: FindCounter) -> List[Dict]:
+    from spil_ui.browser.ui.browser import Browser
+
+    browser = Browser(search="*")
+    browser.show()
+    wait(app, lambda: not browser.entity_search.is_running())
+
+    results = []
+    for search in searches:
+        for run in range(runs):
+            for warm in (False, True):
+                if not warm:
+                    clear_caches()
+                    browser.column_searches = {}
+                browser.launch_search("*")  # each measure starts from the root
+                wait(app, lambda: not browser.entity_search.is_running())
+                result = bench_browser_search(app, browser, search, counter)
+                result.update(path="browser", warm=warm, run=run)
+                results.append(result)
+    browser.close()
+    return results
+
+
+def bench_bar(app, searches: List[str], runs: int, counter: FindCounter) -> List[Dict]:
+    from spil_ui.bar.ui import bar as bar_module
+    from spil_ui.util import sid_index
+
+    # the synthetic Sids must not go to the user's Sid index
+    sid_index._sid_index = sid_index.SidIndex(":memory:")
+
+    bar = bar_module.Bar()
+    bar.show()
+
+    results = []
+    for search in searches:
+        line_text = search.rstrip("*").rstrip("/") + "/"
+        for run in range(runs):
+            for warm in (False, True):
+                if not warm:
+                    bar_module.completion_index.clear()
+
+                done = []
+                on_done = lambda *args: done.append(True)
+                bar.completion_search.done.connect(on_done)
+                bar.lineedit.blockSignals(True)
+                bar.lineedit.setText(line_text)
+                bar.lineedit.blockSignals(False)
+
+                counter.reset()
+                start = time.perf_counter()
+                bar.request_completion()
+                if bar.completion_search.is_running():
+                    completed = wait(app, lambda: bool(done))
+                else:  # answered from the completion index
+                    completed = True
+                seconds = time.perf_counter() - start
+                bar.completion_search.done.disconnect(on_done)
+
+                results.append(
+                    {
+                        "path": "bar",
+                        "search": line_text,
+                        "warm": warm,
+                        "run": run,
+                        "completed": completed,
+                        "completion": seconds,
+                        "completions": len(bar.completer.model().stringList()),
+                        "find_calls": counter.calls,
+                        "find_seconds": counter.seconds,
+                        "fs_calls": counter.fs_calls,
+                    }
+                )
+
+        # typing character by character, with the debounce delay
+        bar_module.completion_index.clear()
+        bar.lineedit.clear()
+        counter.reset()
+        start = time.perf_counter()
+        for character in line_text:
+            bar.lineedit.insert(character)
+            pause(app, typing_interval)
+        wait(app, lambda: not bar.completion_timer.isActive() and not bar.completion_search.is_running())
+        results.append(
+            {
+                "path": "bar typing",
+                "search": line_text,
+                "completion": time.perf_counter() - start,
+                "find_calls": counter.calls,
+                "find_seconds": counter.seconds,
+                "fs_calls": counter.fs_calls,
+            }
+        )
+    bar.close()
+    sid_index._sid_index.close()
+    sid_index._sid_index = None
+    return results
+
+
+def measure_peak_memory(app, searches: List[str], counter: FindCounter) -> Dict[str, int]:
+    """
+    Runs each search cold in the Browser with tracemalloc, and returns the peak memory by search, in bytes.
+    """
+    from spil_ui.browser.ui.browser import Browser
+
+    peaks = {}
+    browser = Browser(search="*")
+    wait(app, lambda: not browser.entity_search.is_running())
+    tracemalloc.start()
+    for search in searches:
+        clear_caches()
+        browser.column_searches = {}
+        if hasattr(tracemalloc, "reset_peak"):  # python 3.9+
+            tracemalloc.reset_peak()
+        bench_browser_search(app, browser, search, counter)
+        peaks[search] = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    browser.close()
+    return peaks
+
+
+def print_results(results: List[Dict], peaks: Dict[str, int]) -> None:
+
+    def ms(value):
+        return f"{value * 1000:9.1f}" if value is not None else f"{'-':>9}"
+
+    print()
+    print(f"{'path':<11}{'search':<44}{'run':<6}{'first ms':>9}{'full ms':>9}{'rows':>7}{'finds':>7}{'find ms':>9}{'fs':>8}")
+    for result in results:
+        run = ("warm" if result.get("warm") else "cold") if "warm" in result else ""
+        print(
+            f"{result['path']:<11}{result['search']:<44}{run:<6}"
+            f"{ms(result.get('first_column'))}"
+            f"{ms(result.get('full_table', result.get('completion')))}"
+            f"{result.get('rows', result.get('completions', '')):>7}"
+            f"{result['find_calls']:>7}"
+            f"{ms(result['find_seconds'])}"
+            f"{result['fs_calls']:>8}"
+            + ("" if result.get("completed", True) else "  (timeout)")
+        )
+    if peaks:
+        print()
+        for search, peak in peaks.items():
+            print(f"Peak memory {search:<44}{peak / 1024:10.1f} KB")
+
+
+def default_searches(size: TreeSize) -> List[str]:
+    """
+    Returns Browser searches along the generated tree: for the first Sid of each type,
+    its entity levels (eg. "hamlet/a/char", "hamlet/a/char/asset000") and its version table ("hamlet/a/char/asset000/art/**").
+    """
+    searches = []
+    types = set()
+    for string, _ in sid_strings(size):
+        parts = string.split("/")
+        if parts[1] in types:
+            continue
+        types.add(parts[1])
+        searches += ["/".join(parts[:3]), "/".join(parts[:4]), "/".join(parts[:5]) + "/**"]
+    return searches
+
+
+def main():
+    parser = argparse.ArgumentParser(description=usage, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=2000, help="approximate number of files")
+    parser.add_argument("--fanout", nargs="+", default=[], help="mean fan-out by key, eg. version=10 task=4")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--write", action="store_true", help="writes the files under the project root, instead of serving them from memory")
+    parser.add_argument("--latency", type=float, default=0.0, help="milliseconds added to each stat / listdir")
+    parser.add_argument("--searches", nargs="+", help="Browser searches (default: along the generated tree)")
+    parser.add_argument("--runs", type=int, default=1)
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    parser.add_argument("--keep", action="store_true", help="keep the written files (with --write)")
+    parser.add_argument("--json", help="writes the results to this json file")
+    args = parser.parse_args()
+
+    size = TreeSize(seed=args.seed)
+    size.fanout.update({key: float(value) for key, value in (item.split("=") for item in args.fanout)})
+    size = size.scaled(args.files)
+    searches = args.searches or default_searches(size)
+
+    print(f"Generating {size}")
+    start = time.perf_counter()
+    created = []  # written files and folders, recorded as they are created
+    try:
+        if args.write:
+            _, skipped = generate(size, created)
+            fs = FakeFS(project_root(size), latency=args.latency / 1000)
+            print(f"Created {len(created)} files and folders in {time.perf_counter() - start:.1f}s ({skipped} skipped Sids)")
+        else:
+            files, skipped = paths(size, progress=lambda count: print(f"  {count} Sids"))
+            fs = FakeFS(project_root(size), files, latency=args.latency / 1000)
+            print(f"Generated {len(files)} files in {time.perf_counter() - start:.1f}s ({skipped} skipped Sids)")
+        print(fs)
+
+        app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+        counter = FindCounter(fs)
+        with fs, counter.patch():
+            results = bench_browser(app, searches, args.runs, counter)
+            results += bench_bar(app, searches[:1], args.runs, counter)
+            peaks = {} if args.no_memory else measure_peak_memory(app, searches, counter)
+    finally:
+        if not args.keep:
+            remove(created)
+
+    print_results(results, peaks)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"size": str(size), "fs": str(fs), "results": results, "peak_memory": peaks}, f, indent=2)
+        print(f"Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
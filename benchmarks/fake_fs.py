@@ -0,0 +1,248 @@
+"""
+This file is part of spil_ui, a UI using SPIL, The Simple Pipeline Lib.
+
+(C) copyright 2019-2024 Michael Haussmann, spil@xeo.info
+
+SPIL_UI is free software and is distributed under the MIT License. See LICENSE file.
+"""
+from __future__ import annotations
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+from collections import Counter
+from pathlib import Path
+import errno
+import os
+import pathlib
+import stat
+import threading
+import time
+import zlib
+
+"""
+A fake file system layer, for the benchmarks.
+
+The FakeFS replaces os.scandir, os.listdir, os.stat and os.lstat, for the paths below a root folder.
+These are the calls of the spil path Finder (glob) and of the spil_ui stat cache (file size and time).
+
+- With files, the tree below the root is served from memory: 10^5 - 10^6 files without touching the disk.
+- Without files, the real file system is used.
+
+In both cases, an artificial latency can be added to each call below the root, to emulate a network file system.
+Calls are counted by function.
+
+Paths outside the root use the real functions.
+
+On Python 3.7 - 3.10, pathlib calls the os functions through its accessor (pathlib._NormalAccessor),
+which holds them since import: the accessor is patched as well, so Path.exists() or Path.stat() use the fake.
+
+Example:
+    files, skipped = paths(TreeSize().scaled(100000))  # see synthetic_tree.py
+    with FakeFS(project_root(size), files, latency=0.002) as fs:
+        ...  # run searches
+    print(fs.calls)
+"""
+
+patched = ("scandir", "listdir", "stat", "lstat")
+
+
+class FakeDirEntry(object):
+    """
+    Minimal os.DirEntry, as used by glob.
+    """
+
+    __slots__ = ("name", "path", "fs", "mtime")
+
+    def __init__(self, fs: FakeFS, directory: str, name: str, mtime: Optional[float]):
+        self.fs = fs
+        self.name = name
+        self.path = os.path.join(directory, name)
+        self.mtime = mtime  # None for a directory
+
+    def is_dir(self, follow_symlinks=True) -> bool:
+        return self.mtime is None
+
+    def is_file(self, follow_symlinks=True) -> bool:
+        return self.mtime is not None
+
+    def is_symlink(self) -> bool:
+        return False
+
+    def inode(self) -> int:
+        return zlib.crc32(self.path.encode())
+
+    def stat(self, follow_symlinks=True) -> os.stat_result:
+        return self.fs.fake_stat(self.path)
+
+    def __fspath__(self) -> str:
+        return self.path
+
+    def __repr__(self):
+        return f"<FakeDirEntry '{self.name}'>"
+
+
+class FakeScandir(object):
+    """
+    Iterator and context manager, as returned by os.scandir.
+    """
+
+    def __init__(self, entries: Iterator[FakeDirEntry]):
+        self.entries = entries
+
+    def __iter__(self):
+        return self.entries
+
+    def __next__(self):
+        return next(self.entries)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self) -> None:
+        self.entries = iter(())
+
+
+class FakeFS(object):
+    """
+    Serves a file tree from memory below the given root (if files are given), and adds latency to each call.
+    Installed as a context manager.
+
+    Args:
+        root: the root folder (typically the project root of the spil configuration)
+        files: (path, modification time) tuples, below the root. If empty, the real file system is used.
+        latency: seconds added to each call below the root (scandir, listdir, stat, lstat)
+    """
+
+    def __init__(self, root: Path | str, files: Iterable[Tuple[Path | str, float]] = (), latency: float = 0.0):
+        self.root = os.path.normpath(os.fspath(root))
+        self.latency = latency
+        self.dirs: Dict[str, Dict[str, Optional[float]]] = {}  # directory: {name: mtime, or None for a directory}
+        self.created = time.time()
+        self.calls: Counter = Counter()
+        self.lock = threading.Lock()
+        self.originals = {}
+        self.accessor_originals = {}  # pathlib accessor functions (python < 3.11)
+        for path, mtime in files:
+            self.add(path, mtime)
+
+    @property
+    def simulated(self) -> bool:
+        return bool(self.dirs)
+
+    def add(self, path: Path | str, mtime: float) -> None:
+        """
+        Adds a file, and its missing parent directories.
+        """
+        path = os.path.normpath(os.fspath(path))
+        if not self.is_below(path):
+            raise ValueError(f'"{path}" is not below the root "{self.root}"')
+        directory, name = os.path.split(path)
+        self.dirs.setdefault(directory, {})[name] = mtime
+        while directory != self.root:
+            parent, name = os.path.split(directory)
+            children = self.dirs.setdefault(parent, {})
+            if name in children:
+                break
+            children[name] = None
+            directory = parent
+
+    def is_below(self, path: str) -> bool:
+        return path == self.root or path.startswith(self.root + os.sep)
+
+    def count_files(self) -> int:
+        return sum(1 for children in self.dirs.values() for mtime in children.values() if mtime is not None)
+
+    # file system functions
+
+    def target(self, path, function: str) -> Optional[str]:
+        """
+        Returns the normalized path if the call is below the root (after counting it, and waiting the latency).
+        Returns None if the real function must be used.
+        """
+        if isinstance(path, int) or isinstance(path, bytes) or path is None:
+            return None
+        path = os.path.normpath(os.fspath(path))
+        if not self.is_below(path):
+            return None
+        with self.lock:
+            self.calls[function] += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return path
+
+    def fake_stat(self, path: str) -> os.stat_result:
+        if path in self.dirs:
+            return os.stat_result((stat.S_IFDIR | 0o755, 0, 0, 1, 0, 0, 4096, self.created, self.created, self.created))
+        directory, name = os.path.split(path)
+        mtime = self.dirs.get(directory, {}).get(name, False)
+        if mtime is False or mtime is None:
+            raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), path)
+        size = zlib.crc32(path.encode()) % (200 * 1024 * 1024)  # a stable pseudo random size
+        return os.stat_result((stat.S_IFREG | 0o644, 0, 0, 1, 0, 0, size, mtime, mtime, mtime))
+
+    def scandir(self, path="."):
+        target = self.target(path, "scandir")
+        if target is None or not self.simulated:
+            return self.originals["scandir"](path)
+        if target not in self.dirs:
+            raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), target)
+        children = list(self.dirs[target].items())
+        return FakeScandir(FakeDirEntry(self, target, name, mtime) for name, mtime in children)
+
+    def listdir(self, path="."):
+        target = self.target(path, "listdir")
+        if target is None or not self.simulated:
+            return self.originals["listdir"](path)
+        if target not in self.dirs:
+            raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), target)
+        return list(self.dirs[target])
+
+    def stat(self, path, *args, **kwargs):
+        target = self.target(path, "stat")
+        if target is None or not self.simulated:
+            return self.originals["stat"](path, *args, **kwargs)
+        return self.fake_stat(target)
+
+    def lstat(self, path, *args, **kwargs):
+        target = self.target(path, "lstat")
+        if target is None or not self.simulated:
+            return self.originals["lstat"](path, *args, **kwargs)
+        return self.fake_stat(target)
+
+    # installation
+
+    def install(self) -> None:
+        for name in patched:
+            self.originals[name] = getattr(os, name)
+            setattr(os, name, getattr(self, name))
+
+        accessor = getattr(pathlib, "_NormalAccessor", None)  # python < 3.11
+        if accessor is not None:
+            for name in patched:
+                if name in vars(accessor):  # python 3.10 has no lstat (stat with follow_symlinks=False)
+                    self.accessor_originals[name] = vars(accessor)[name]
+                    setattr(accessor, name, staticmethod(getattr(self, name)))
+            if "stat" not in self.accessor_originals:
+                self.uninstall()
+                raise RuntimeError("Unable to patch pathlib: its accessor has no stat function")
+
+    def uninstall(self) -> None:
+        for name, function in self.originals.items():
+            setattr(os, name, function)
+        self.originals = {}
+        accessor = getattr(pathlib, "_NormalAccessor", None)
+        for name, function in self.accessor_originals.items():
+            setattr(accessor, name, function)
+        self.accessor_originals = {}
+
+    def __enter__(self):
+        self.install()
+        return self
+
+    def __exit__(self, *args):
+        self.uninstall()
+
+    def __str__(self):
+        mode = f"{self.count_files()} files in memory" if self.simulated else "real files"
+        return f'{self.__class__.__name__}("{self.root}", {mode}, latency={self.latency * 1000:g}ms)'
@@ -0,0 +1,326 @@
+"""
+This file is part of spil_ui, a UI using SPIL, The Simple Pipeline Lib.
+
+(C) copyright 2019-2024 Michael Haussmann, spil@xeo.info
+
+SPIL_UI is free software and is distributed under the MIT License. See LICENSE file.
+"""
+from __future__ import annotations
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+from dataclasses import dataclass, field
+from pathlib import Path
+import os
+import random
+import re
+import time
+
+usage = """
+Generates a synthetic project tree, for the benchmarks.
+
+The tree is driven by the Sid templates of the spil configuration (conf.sid_templates):
+for each file template (eg. "asset__file": "{project}/{type:a}/{assettype}/{asset}/{task}/{version}/{state}/{ext:scenes}"),
+the values of each key are generated with a random fan-out around a mean (TreeSize.fanout):
+- keys with a value list in their pattern (eg. tasks, asset types, extensions) sample that list
+- keys with a numbered pattern (eg. version "v\\d\\d\\d", shot "sh\\d\\d\\d\\d") are numbered: v001, v002 / sh0010, sh0020
+- other keys (eg. asset, node) get generated names: asset000, asset001
+
+The generation is deterministic for a given seed, and templates sharing a prefix share the same values
+(eg. "asset__file" and "asset__movie_file" are generated in the same versions).
+
+File times are realistic: the versions of a task are spread over time, in order.
+
+The tree can be written to disk under the project root of the spil configuration (generate),
+or served from memory by a fake file system (see fake_fs.py), for 10^5 - 10^6 files.
+
+Usage:
+    python benchmarks/synthetic_tree.py --files 100000          # prints the tree statistics
+    python benchmarks/synthetic_tree.py --files 2000 --write    # writes the files
+"""
+from spil import Sid, conf
+
+default_templates = (
+    "asset__file",
+    "asset__movie_file",
+    "shot__file",
+    "shot__movie_file",
+    "shot__cache_file",
+)
+
+# mean number of values per parent, by key
+default_fanout = {
+    "project": 1,
+    "type": 2,
+    "assettype": 3,
+    "asset": 10,
+    "sequence": 4,
+    "shot": 10,
+    "task": 3,
+    "version": 6,
+    "state": 1.2,
+    "node": 2,
+    "ext": 1.5,
+}
+
+sequential_keys = ["version"]  # numbered by 1 (v001, v002), other numbered keys by 10 (sh0010, sh0020)
+# fan-outs adjusted by TreeSize.scaled, with their share of the scaling (by template: asset, or sequence x shot)
+scale_keys = {"asset": 1.0, "sequence": 0.5, "shot": 0.5}
+version_key = "version"  # the versions of a parent are spread over time
+
+token = re.compile(r"^{(\w+)(?::\((.*)\))?}$")  # "{key}" or "{key:(value|value|...)}"
+numbered = re.compile(r"^(\w*?)((?:\\d)+)$")
+
+Values = Callable[[random.Random, int], List[str]]
+
+
+@dataclass
+class TreeSize:
+    projects: Sequence[str] = ("hamlet",)
+    templates: Sequence[str] = default_templates
+    fanout: Dict[str, float] = field(default_factory=lambda: dict(default_fanout))
+    seed: int = 0
+    days: float = 365  # time span of the file times
+
+    def scaled(self, files: int) -> TreeSize:
+        """
+        Returns a copy of the TreeSize, with the "scale_keys" fan-outs adjusted to give about the given number of files.
+        """
+        size = TreeSize(self.projects, self.templates, dict(self.fanout), self.seed, self.days)
+        for _ in range(3):  # a few passes, as fan-outs are at least 1
+            factor = files / max(estimate(size), 1)
+            for key, share in scale_keys.items():
+                size.fanout[key] = max(1.0, size.fanout.get(key, 1) * factor**share)
+        return size
+
+    def __str__(self):
+        fanout = ", ".join(f"{key}={value:g}" for key, value in self.fanout.items())
+        return f"{len(self.projects)} projects, templates {', '.join(self.templates)}, fan-out {fanout}"
+
+
+def values_for(key: str, pattern: Optional[str]) -> Values:
+    """
+    Returns the function that generates "count" values for the key, given the alternatives of its pattern.
+    """
+    options = [option for option in pattern.split("|") if option not in (r"\*", r"\>")] if pattern else []
+
+    if len(options) == 1 and numbered.match(options[0]):
+        prefix, digits = numbered.match(options[0]).groups()
+        digits = len(digits) // 2
+        step = 1 if key in sequential_keys else 10
+        limit = (10**digits - 1) // step
+
+        def numbered_values(rng, count):
+            return [f"{prefix}{i * step:0{digits}d}" for i in range(1, min(count, limit) + 1)]
+
+        return numbered_values
+
+    pool = pool_values(pattern)
+    if pool:
+
+        def pooled_values(rng, count):
+            chosen = set(rng.sample(pool, min(count, len(pool))))
+            return [option for option in pool if option in chosen]
+
+        return pooled_values
+
+    def named_values(rng, count):
+        return [f"{key}{i:03d}" for i in range(count)]
+
+    return named_values
+
+
+def pool_values(pattern: Optional[str]) -> List[str]:
+    """
+    Returns the literal values of a pattern (eg. tasks), without search symbols and aliases (eg. "maya" for "ma" and "mb").
+    """
+    aliases = getattr(conf, "extension_alias", {})
+    options = pattern.split("|") if pattern else []
+    return [option for option in options if re.match(r"^\w+$", option) and option not in aliases]
+
+
+def fan(rng: random.Random, mean: float) -> int:
+    """
+    Returns a random count, around the given mean.
+    """
+    count = rng.uniform(0.5, 1.5) * mean
+    whole = int(count)
+    return max(1, whole + (rng.random() < count - whole))
+
+
+def template_keys(template_name: str) -> List[Tuple[str, Optional[str]]]:
+    """
+    Returns the keys of a Sid template, with the alternatives of their pattern, if any.
+    Example: ("ext", "ma|mb|hip|...|\\*|\\>")
+    """
+    template = conf.sid_templates[template_name]
+    result = []
+    for part in template.split(conf.sip):
+        match = token.match(part)
+        if not match:
+            raise ValueError(f'Unable to read the template "{template_name}": {template}')
+        result.append(match.groups())
+    return result
+
+
+def estimate(size: TreeSize) -> int:
+    """
+    Returns the approximate number of files of the tree.
+    """
+    total = 0
+    for template_name in size.templates:
+        count = 1.0
+        for key, pattern in template_keys(template_name):
+            if key == "project":
+                count *= len(size.projects)
+                continue
+            mean = size.fanout.get(key, 1)
+            pool = pool_values(pattern)
+            if pool:
+                mean = min(mean, len(pool))
+            count *= mean
+        total += count
+    return int(total)
+
+
+def sid_strings(size: TreeSize) -> Iterator[Tuple[str, float]]:
+    """
+    Yields the Sid strings of the files of the tree, with their modification time.
+
+    Values depend only on the seed and the parent Sid string: templates sharing a prefix share their values.
+    """
+    now = time.time()
+    span = size.days * 24 * 3600
+
+    for template_name in size.templates:
+        keys = template_keys(template_name)
+        generators = [values_for(key, pattern) for key, pattern in keys]
+
+        def walk(depth: int, prefix: str, mtime: float) -> Iterator[Tuple[str, float]]:
+            key = keys[depth][0]
+            rng = random.Random(f"{size.seed}:{prefix}:{key}")
+            if key == "project":
+                values = list(size.projects)
+            else:
+                values = generators[depth](rng, fan(rng, size.fanout.get(key, 1)))
+
+            for i, value in enumerate(values):
+                string = f"{prefix}/{value}" if prefix else value
+                if key == version_key:
+                    # versions are spread in order, from a random start to now
+                    start = now - span * rng.uniform(0.1, 1.0)
+                    child_time = start + (now - start) * (i + rng.random()) / len(values)
+                else:
+                    child_time = mtime
+                if depth == len(keys) - 1:
+                    yield string, child_time
+                else:
+                    yield from walk(depth + 1, string, child_time)
+
+        yield from walk(0, "", now)
+
+
+def paths(size: TreeSize, progress: Optional[Callable[[int], None]] = None) -> Tuple[List[Tuple[Path, float]], int]:
+    """
+    Returns the paths of the files of the tree, with their modification time (Sid.path()).
+    Sid strings that the configuration does not resolve are skipped.
+
+    Returns:
+        tuple: the (path, mtime) list, and the number of skipped Sids
+    """
+    result = []
+    skipped = 0
+    for count, (string, mtime) in enumerate(sid_strings(size), start=1):
+        sid = Sid(string)
+        path = sid.path() if sid.string == string else None
+        if path:
+            result.append((path, mtime))
+        else:
+            skipped += 1
+        if progress and not count % 10000:
+            progress(count)
+    return result, skipped
+
+
+def project_root(size: TreeSize) -> Path:
+    """
+    Returns the root path of the first project of the tree.
+    """
+    return Sid(size.projects[0]).path()
+
+
+def generate(size: TreeSize, created: Optional[List[Path]] = None) -> Tuple[List[Path], int]:
+    """
+    Creates an empty file for each Sid of the tree, if it does not exist, with its modification time.
+    Sid strings that the configuration does not resolve are skipped.
+
+    Args:
+        size: the tree to generate
+        created: if given, created files and folders are appended to it as they are created,
+            so they can be removed even if the generation fails
+
+    Returns:
+        tuple: the created files and folders (in creation order), and the number of skipped Sids
+    """
+    created = [] if created is None else created
+    files, skipped = paths(size)
+    for path, mtime in files:
+        if path.exists():
+            continue
+
+        missing = []
+        parent = path.parent
+        while not parent.exists():
+            missing.append(parent)
+            parent = parent.parent
+        for folder in reversed(missing):
+            folder.mkdir()
+            created.append(folder)
+
+        path.touch()
+        created.append(path)
+        os.utime(path, (mtime, mtime))
+    return created, skipped
+
+
+def remove(created: Sequence[Path]) -> None:
+    """
+    Removes the files and folders created by generate().
+    """
+    for path in reversed(created):
+        try:
+            if path.is_dir():
+                path.rmdir()
+            else:
+                path.unlink()
+        except OSError:
+            pass
+
+
+if __name__ == "__main__":
+
+    import argparse
+    from collections import Counter
+
+    parser = argparse.ArgumentParser(description=usage, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, help="approximate number of files")
+    parser.add_argument("--fanout", nargs="+", default=[], help="mean fan-out by key, eg. asset=50 version=10")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--write", action="store_true", help="writes the files under the project root")
+    args = parser.parse_args()
+
+    size = TreeSize(seed=args.seed)
+    size.fanout.update({key: float(value) for key, value in (item.split("=") for item in args.fanout)})
+    if args.files:
+        size = size.scaled(args.files)
+    print(size)
+    print(f"Estimated: {estimate(size)} files")
+
+    if args.write:
+        start = time.time()
+        created, skipped = generate(size)
+        print(f"Created {len(created)} files and folders in {time.time() - start:.1f}s ({skipped} skipped Sids)")
+    else:
+        start = time.time()
+        templates = Counter()
+        for string, mtime in sid_strings(size):
+            templates[string.split("/")[1]] += 1
+        print(f"Generated {sum(templates.values())} Sids in {time.time() - start:.1f}s, by type: {dict(templates)}")
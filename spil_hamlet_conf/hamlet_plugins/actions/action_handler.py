@@ -31,13 +31,20 @@ class ExampleActionHandler(AbstractActionHandler, QtWidgets.QWidget):
 
     Implements a series of Buttons, as defined in example_actions.
     Buttons call a function using the selected Sid.
+
+    The actions are resolved in a worker thread (they check the file system),
+    the buttons are updated in the Qt main thread.
     """
 
+    resolve_in_thread = True
+
     def __init__(self):
         super(ExampleActionHandler, self).__init__()
         self.uio = Dialogs()
         self.selection = None
+        self.actions = {}  # resolved actions of the selection
         self.buttons = []
+        self.get_action_for_sid = None
 
     def init(self, parent_window, parent_widget, callback=None):
         self.parent_window = parent_window
@@ -48,25 +55,43 @@ class ExampleActionHandler(AbstractActionHandler, QtWidgets.QWidget):
         self.callback = callback
 
     def update(self, selection):
+        self.update_resolved(selection, self.get_actions_by_sid(selection))
 
-        self.selection = selection
+    def resolve(self, selection):
+        return self.get_actions_by_sid(selection)
 
-        self.action_box.setTitle("Actions")
-        for b in self.buttons:
-            b.setVisible(False)
-            b.deleteLater()
-        self.buttons = []
+    def set_stale(self, stale):
+        # the buttons are those of the previous selection, until the update
+        self.action_box.setEnabled(not stale)
 
-        actions = self.get_actions_by_sid(self.selection)
-        for action in actions:
-            button = QtWidgets.QPushButton("&" + action, self.parent_window)
+    def update_resolved(self, selection, actions):
+
+        self.selection = selection
+        self.actions = actions or {}
+
+        # buttons are reused: only changed buttons are relabeled, missing ones are added, extra ones removed
+        for i, action in enumerate(self.actions):
+            if i < len(self.buttons):
+                button = self.buttons[i]
+                if button.objectName() == action:
+                    continue
+            else:
+                button = QtWidgets.QPushButton(self.parent_window)
+                button.clicked.connect(self.run_actions)
+                self.action_layout.addWidget(button)
+                self.buttons.append(button)
+
+            button.setText("&" + action)
             button.setToolTip(
-                (actions.get(action).__doc__ or "").strip().replace("\t", "")
+                (self.actions.get(action).__doc__ or "").strip().replace("\t", "")
             )
             button.setObjectName(action)
-            button.clicked.connect(self.run_actions)
-            self.action_layout.addWidget(button)
-            self.buttons.append(button)
+
+        for button in self.buttons[len(self.actions) :]:
+            self.action_layout.removeWidget(button)
+            button.setVisible(False)
+            button.deleteLater()
+        del self.buttons[len(self.actions) :]
 
     def run_actions(self):  # TODO: more advanced features with parameters or options
 
@@ -93,15 +118,19 @@ class ExampleActionHandler(AbstractActionHandler, QtWidgets.QWidget):
     def runner(self, action, selection):
         msg = f'Now running {action} on "{selection}"'
         log.info(msg)
-        func = self.get_actions_by_sid(selection, action)
+        if selection is self.selection and action in self.actions:
+            func = self.actions.get(action)  # resolved on update
+        else:
+            func = self.get_actions_by_sid(selection, action)
         func(selection)
         # self.uio.inform(msg)
 
-    @staticmethod
-    def get_actions_by_sid(selection, action=None):
+    def get_actions_by_sid(self, selection, action=None):
 
-        from hamlet_plugins.actions.example_actions import get_action_for_sid  # fmt: skip
-        actions = get_action_for_sid(selection)
+        if self.get_action_for_sid is None:
+            from hamlet_plugins.actions.example_actions import get_action_for_sid  # fmt: skip
+            self.get_action_for_sid = get_action_for_sid
+        actions = self.get_action_for_sid(selection)
 
         if action:
             return actions.get(action)
@@ -8,6 +8,7 @@ SPIL is free software and is distributed under the MIT License. See LICENCE file
 
 This file implements simple functions to be used in the ExampleActionHandler,
 to illustrate how it works.
+The functions are registered in an ActionRegistry, which caches their resolution by Sid type.
 """
 from __future__ import annotations
 import subprocess, os, platform
@@ -15,6 +16,8 @@ from typing import Callable, Optional
 
 from spil import Sid
 from spil import logging
+from spil_ui.util.sid_pool import get_sid
+from spil_ui.browser.ui.action_registry import ActionRegistry
 
 log = logging.get_logger("action_handler")
 log.setLevel(logging.INFO)
@@ -25,12 +28,7 @@ def get_action_for_sid(sid: Optional[Sid]) -> dict[str, Callable]:
     Returns actions that are available for a given Sid.
     This is just an example to work with the ExampleActionHandler.
     """
-    actions = {
-        "explore": explore,
-    }
-    if sid.path() and sid.path().is_file():
-        actions["open"] = open
-    return actions
+    return registry.get_actions(sid)
 
 
 def explore(sid: Sid | str) -> bool:
@@ -46,16 +44,16 @@ def open(sid: Sid | str, explore: bool = False) -> bool:
     Opens the given Sid's path.
     """
     log.debug(f"Open: {sid} ")
-    path = Sid(sid).path()
+    path = get_sid(sid).path()
     if not path:
-        log.info(f'Given Sid "{sid}" ("{Sid(sid)}") has no path')
+        log.info(f'Given Sid "{sid}" ("{get_sid(sid)}") has no path')
         return False
 
     if explore and not path.is_dir():
         path = path.parent
 
     if not path.exists():
-        log.info(f'Path does not exist. Path "{path}" for "{sid}" ("{Sid(sid)}")')
+        log.info(f'Path does not exist. Path "{path}" for "{sid}" ("{get_sid(sid)}")')
         return False
 
     try:
@@ -70,10 +68,15 @@ def open(sid: Sid | str, explore: bool = False) -> bool:
             subprocess.call(("xdg-open", resolved))  # linux variants
 
     except Exception as ex:
-        log.error(f'Error in explore: "{path}" for "{sid}" ("{Sid(sid)}"). Error: {ex}')
+        log.error(f'Error in explore: "{path}" for "{sid}" ("{get_sid(sid)}"). Error: {ex}')
         return False
 
 
+registry = ActionRegistry()
+registry.register("explore", explore)
+registry.register("open", open, needs_file=True)
+
+
 if __name__ == "__main__":
 
     sid = Sid("hamlet/a/char/ophelia/model/v001/p/ma")
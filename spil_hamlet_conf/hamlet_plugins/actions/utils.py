@@ -5,42 +5,65 @@ This file is part of spil_ui, a UI using SPIL, The Simple Pipeline Lib.
 
 SPIL is free software and is distributed under the MIT License. See LICENCE file.
 """
-from spil import log
-from spil.util.caching import lru_kw_cache as cache
-from spil_ui.util.time_tools import toHumanReadableLapse
+from spil_ui.util.time_tools import toHumanReadableLapse, toHumanReadableLapses
+from spil_ui.util.stat_cache import sid_stat
 
 
-@cache
 def get_time(sid, human=True):
     """
     Returns the timestamp of the given sids file, or 0.
     If "human" is True, returns a human-readable format (until second).
+    Uses the shared stat of the Sid (see spil_ui.util.stat_cache), which handles caching.
     """
-    path = sid.path()
-    if path:
-        result = path.stat().st_mtime
-    else:
-        result = 0
+    stat = sid_stat(sid)
+    result = stat.st_mtime if stat else 0
     if human:
-        if result:
-            result = toHumanReadableLapse(result)
-        else:
-            result = "--"
+        result = format_time(result)
 
     return result
 
 
-@cache
-def get_size(sid, human=True):
+def format_time(timestamp):
+    """
+    Returns the given timestamp as a human-readable lapse, eg. "3 minutes ago", or "--".
+    """
+    if timestamp:
+        return toHumanReadableLapse(timestamp)
+    return "--"
+
+
+def format_times(timestamps):
+    """
+    Formats a column of timestamps at once (see format_time).
+    """
+    labels = toHumanReadableLapses(timestamps)
+    return [label if timestamp else "--" for timestamp, label in zip(timestamps, labels)]
 
-    path = sid.path()
-    size = 0
-    try:
-        size = path.stat().st_size
-    except Exception as ex:
-        log.debug(ex)
+
+def get_size(sid, human=True):
+    """
+    Returns the file size of the given sids file, or 0.
+    If "human" is True, returns a human-readable format (in Mo).
+    Uses the shared stat of the Sid (see spil_ui.util.stat_cache), which handles caching.
+    """
+    stat = sid_stat(sid)
+    size = stat.st_size if stat else 0
 
     if human:
-        size = "{0:9.2f} Mo".format((float(size) / (1024 * 1024)))
+        size = format_size(size)
 
     return size
+
+
+def format_size(size):
+    """
+    Returns the given size in bytes as a human-readable format (in Mo).
+    """
+    return "{0:9.2f} Mo".format((float(size) / (1024 * 1024)))
+
+
+def format_sizes(sizes):
+    """
+    Formats a column of sizes at once (see format_size).
+    """
+    return [format_size(size) for size in sizes]
@@ -8,7 +8,8 @@ SPIL is free software and is distributed under the MIT License. See LICENCE file
 """
 This is the example configuration for spil_ui
 """
-from hamlet_plugins.actions.utils import get_size, get_time
+from functools import partial
+from hamlet_plugins.actions.utils import get_size, get_time, format_sizes, format_times
 
 sid_usage_history_len = 20
 application_name = "Spil"
@@ -19,7 +20,12 @@ browser_title = "Browser @ Spil"
 # Columns that will be shown in the "Versions table".
 table_bloc_columns = ["Sid", "Size", "Time"]
 # functions that will be called for each Sid, in the same order as the table_bloc_columns.
-table_bloc_functions = [get_size, get_time]
+table_bloc_functions = [partial(get_size, human=False), partial(get_time, human=False)]
+# optional functions that format the values of the table_bloc_functions for display (in the same order).
+# They receive a list of values (a column), and return the list of labels.
+# They are called when the table is painted. This way the values are stored raw (eg. float timestamps),
+# and formatted only for loaded rows, and relative times ("3 minutes ago") stay correct.
+table_bloc_formatters = [format_sizes, format_times]
 
 # these fields trigger a reset of the search sid - else we are "sticky" and only change the given key.
 search_reset_keys = [
@@ -51,6 +57,26 @@ extension_filters = [
 ]  # 'nk', 'spp'
 
 
+# Configuration for the Bar
+
+# delay in milliseconds after the last keystroke, before the Bar searches for completions.
+bar_completion_delay = 150
+
+# path of the local Sid index database, used by the Bar for substring search (eg. "oph rig").
+# None uses the default: ~/.spil_ui/sid_index.db
+sid_index_path = None
+
+
+# Profiling
+
+# times the phases of the search cycle, shows them in the Browser status bar,
+# and writes them as JSON when a window is closed. Can also be enabled by the environment variable SPIL_UI_PROFILE=1
+profile = False
+
+# path of the JSON profile. None uses the default: ~/.spil_ui/profile.json
+profile_path = None
+
+
 #  "leaf" means the last key of a Sid. Typically the extension "ext".
 #  Can be overridden depending on type.
 def is_leaf(sid):
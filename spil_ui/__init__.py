@@ -1,2 +1,39 @@
-from spil_ui.browser.ui.browser import Browser, open_browser, app
-from spil_ui.bar.ui.bar import Bar, open_bar, app as bar
+"""
+The Browser and the Bar are imported on first access,
+so the UI agnostic parts (eg. spil_ui.engine) can be used without Qt.
+
+"spil_ui.bar" is the Bar app (as "from spil_ui import bar"), not the bar subpackage.
+"""
+import importlib
+import sys
+import types
+
+_exports = {
+    "Browser": ("spil_ui.browser.ui.browser", "Browser"),
+    "open_browser": ("spil_ui.browser.ui.browser", "open_browser"),
+    "app": ("spil_ui.browser.ui.browser", "app"),
+    "Bar": ("spil_ui.bar.ui.bar", "Bar"),
+    "open_bar": ("spil_ui.bar.ui.bar", "open_bar"),
+    "bar": ("spil_ui.bar.ui.bar", "app"),
+}
+
+
+def __getattr__(name):
+    if name not in _exports:
+        raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
+    module, attribute = _exports[name]
+    value = getattr(importlib.import_module(module), attribute)
+    globals()[name] = value
+    return value
+
+
+class _Package(types.ModuleType):
+    def __setattr__(self, name, value):
+        # the import system binds each loaded subpackage on its parent:
+        # the "bar" subpackage must not replace the "bar" app.
+        if name in _exports and isinstance(value, types.ModuleType):
+            return
+        super(_Package, self).__setattr__(name, value)
+
+
+sys.modules[__name__].__class__ = _Package
@@ -18,10 +18,16 @@ from qtpy.QtWidgets import QApplication, QLineEdit, QWidget, QGridLayout, QCompl
 from qtpy.QtCore import Qt
 
 from spil import logging
-from spil import FindInAll, Sid
+from spil import Sid
 from spil_ui import conf as uiconf
+from spil_ui.util.sid_pool import get_sid
+from spil_ui.util.sid_index import get_sid_index
+from spil_ui.util.instrument import profiler
+from spil_ui.browser.ui.search_executor import SearchExecutor
+from spil_ui.browser.ui.action_handler import request_update
 
 from spil_ui.bar.ui.bar_qt_helper import EventLineEdit
+from spil_ui.bar.ui.completion_index import CompletionIndex
 
 import spil.util.log as sl
 sl.setLevel(sl.ERROR)
@@ -29,6 +35,10 @@ sl.setLevel(sl.ERROR)
 log = logging.get_logger(name="spil_ui")
 log.setLevel(logging.INFO)
 
+# Sids found by completion searches. Shared by Bar instances.
+completion_index = CompletionIndex()
+
+
 class Bar(QWidget):
     """
     The Bar window features a line edit on top of Action Handler Buttons.
@@ -37,6 +47,17 @@ class Bar(QWidget):
 
     The Tab, Arrow-right and Arrow-left keys help speed up the navigation.
 
+    Typing is never blocked by a search:
+    the completion search starts "bar_completion_delay" milliseconds after the last keystroke,
+    and runs in a background thread. A new keystroke supersedes the search in flight,
+    and only the results of the latest search update the completer.
+    Found Sids are kept in a completion index: searches that were already explored
+    are answered from memory, without calling the Finder.
+
+    Text with spaces is a substring search in the local Sid index (see spil_ui.util.sid_index):
+    "oph rig" completes to "hamlet/a/char/ophelia/rig/...".
+    Found Sids are added to the index.
+
     The Bar is still somewhat experimental.
     """
 
@@ -64,7 +85,18 @@ class Bar(QWidget):
         self.action_handler.init(self, layout, callback=self.done_action)
         log.debug(f"Loaded action handler {self.action_handler}")
 
-        self.f = FindInAll()
+        # completion searches are debounced, and run in a background thread
+        self.completion_timer = QtCore.QTimer(self)
+        self.completion_timer.setSingleShot(True)
+        self.completion_timer.setInterval(getattr(uiconf, "bar_completion_delay", 150))
+        self.completion_timer.timeout.connect(self.request_completion)
+
+        self.completion_search = SearchExecutor(self)
+        self.completion_search.found.connect(self.fill_completion)
+        self.completion_search.done.connect(self.done_completion)
+        self.completion_request = None
+        self.sid_index = get_sid_index()
+
         if search:
             self.lineedit.setText(search)
 
@@ -80,30 +112,29 @@ class Bar(QWidget):
 
     def get_request(self, line_text):
         """
-        For the current line text, retrieves the data for auto completion.
-        Builds a search with the current line text, and calls the Sid Finder.
+        For the current line text, returns the search for auto completion.
+        The search is run by the Sid Finder, in a background thread (see request_completion).
 
         Args:
             line_text: the current line text
 
         Returns:
-            list of Sid strings
+            the search Sid string, or None if there is nothing to search
 
         """
 
         # print(f'In: {line_text}')
 
         search = None
-        found = None
 
         if not line_text.count("/"):
-            search = Sid("*")
+            search = get_sid("*")
             # print(search)
 
         # input becomes a search
         if line_text.endswith("/"):
 
-            search = Sid(line_text.rstrip('/'))
+            search = get_sid(line_text.rstrip('/'))
             # print(f'search in: {search}')
 
             key = uiconf.basetype_to_cut.get(search.basetype, "task")
@@ -117,41 +148,116 @@ class Bar(QWidget):
         #     print(f'Valid: {Sid(line_text)}')
         #     search = Sid(line_text.rstrip('/')).parent
 
-        if str(search):
-            # print(f'seach run: {search}')
-            found = sorted(self.f.find(search, as_sid=False))
-
-            # FIXME: set single option choice
-            if len(found) == 1:
-                self.lineedit.setText(found[0])
-
         # if line_text.endswith("*") or line_text.count("**"):
         #     search = Sid(line_text)
         #     print(search)
         #     found = ["*", "**"] + sorted(list(f.find(search, as_sid=False)))
 
-        # print(f'Out: {found}')
+        # print(f'Out: {search}')
 
-        return found
+        return str(search) if search is not None else None
 
     def text_changed(self):
         """
-        When the line edit text changes, we send the Sid to the action handler,
-        and update data for the completer.
+        When the line edit text changes, (re)starts the completion timer.
+        The action handler and the completer are updated when typing pauses (see request_completion).
+        """
+        self.completion_timer.start()
+
+    @profiler.timed("bar.request_completion")
+    def request_completion(self):
+        """
+        Called when typing pauses.
+        Sends the Sid to the action handler, and updates the completer.
+        If the search was already explored, completions come from the completion index,
+        else the search is started in the background.
+        The search in flight, if any, is superseded.
         """
+        line_text = self.lineedit.text()
+
+        # substring search in the Sid index
+        if " " in line_text.strip():
+            self.completion_search.cancel()
+            if self.sid_index is not None:
+                self.set_completions(line_text, self.sid_index.search(line_text), unfiltered=True)
+            return
 
         # Send to action handler
-        sid = Sid(self.lineedit.text())
+        sid = get_sid(line_text)
         if sid:  # sid.exists()
             self.current_sid = sid
-            self.action_handler.update(self.current_sid)
+            request_update(self.action_handler, self.current_sid)
         # else: color in grey #IDEA
 
         # get data for auto completer
-        vals = self.get_request(self.lineedit.text())
-        if vals:
-            model = self.completer.model()
-            model.setStringList(vals)  # Updated the QStringListModel string list
+        search = self.get_request(line_text)
+        if not search:
+            self.completion_search.cancel()
+            return
+
+        if completion_index.explored(search):
+            self.completion_search.cancel()
+            self.set_completions(line_text, completion_index.complete(search))
+            return
+
+        self.completion_request = search
+        self.completion_search.submit([(line_text, search, False)])
+
+    def fill_completion(self, line_text, found):
+        """
+        Receives a batch of found Sid strings for the latest completion search,
+        and adds them to the completion index, and the Sid index (written in a background thread).
+        """
+        completion_index.add(found)
+        if self.sid_index is not None:
+            self.sid_index.add_later(found)
+
+    def done_completion(self, line_text):
+        """
+        Called when the latest completion search is done.
+        Marks the search as explored, and updates the completer.
+        """
+        completion_index.set_explored(self.completion_request)
+        self.set_completions(line_text, completion_index.complete(self.completion_request))
+
+    @profiler.timed("bar.set_completions")
+    def set_completions(self, line_text, found, unfiltered=False):
+        """
+        Updates the completer data with the given Sid strings.
+        If unfiltered is True (substring search), the completer shows all of them,
+        else it filters them by prefix.
+        """
+        if unfiltered:
+            self.completer.setCompletionMode(QCompleter.UnfilteredPopupCompletion)
+            self.completer.model().setStringList(found)
+            if found:
+                self.completer.complete()
+            else:
+                self.completer.popup().hide()
+            return
+
+        if self.completer.completionMode() != QCompleter.PopupCompletion:
+            # back from a substring search: its results are dropped
+            self.completer.setCompletionMode(QCompleter.PopupCompletion)
+            self.completer.model().setStringList([])
+
+        if not found:
+            return
+
+        # FIXME: set single option choice
+        if len(found) == 1 and line_text == self.lineedit.text():
+            self.lineedit.setText(found[0])
+
+        model = self.completer.model()
+        if model.stringList() != found:
+            model.setStringList(found)  # Updated the QStringListModel string list
+
+    def closeEvent(self, arg=None):
+        self.completion_timer.stop()
+        self.completion_search.cancel()
+        if profiler.enabled:
+            log.info(f"Profile written to {profiler.dump()}")
+        super(Bar, self).closeEvent(arg)
 
 
 def open_bar(
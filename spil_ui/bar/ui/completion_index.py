@@ -0,0 +1,111 @@
+"""
+This file is part of spil_ui, a UI using SPIL, The Simple Pipeline Lib.
+
+(C) copyright 2019-2024 Michael Haussmann, spil@xeo.info
+
+SPIL_UI is free software and is distributed under the MIT License. See LICENSE file.
+"""
+from __future__ import annotations
+from typing import Iterable, List, Optional
+import bisect
+import heapq
+
+"""
+In memory completion index for the Bar.
+
+The index keeps every Sid string found by the Bar's completion searches, in a sorted list.
+Completions for a search are answered with two bisections (a prefix range),
+so once a search has been explored, the Finder is not called again for it.
+
+The Bar's completion searches are of three forms (see Bar.get_request):
+- "*": the root Sids (no "/")
+- "prefix/*": the direct children of prefix
+- "prefix/**": all descendants of prefix
+
+Explored searches expire after "ttl" seconds, so they are searched again,
+and new files show up.
+"""
+from spil_ui.util.cache import TTLCache
+
+end = "\uffff"  # sorts after any character used in Sid strings
+
+
+class CompletionIndex(object):
+    """
+    Sorted array of Sid strings, with prefix lookups.
+
+    Example:
+        >>> index = CompletionIndex()
+        >>> index.add(["hamlet/a/char", "hamlet/a", "hamlet/s", "hamlet", "other"])
+        >>> index.explored("hamlet/*")
+        False
+        >>> index.set_explored("hamlet/*")
+        >>> index.complete("hamlet/*")
+        ['hamlet/a', 'hamlet/s']
+        >>> index.complete("hamlet/**")
+        ['hamlet/a', 'hamlet/a/char', 'hamlet/s']
+        >>> index.complete("*")
+        ['hamlet', 'other']
+        >>> index.add([f"hamlet/a/char/c{i:02d}" for i in range(40)] + ["hamlet/a"])
+        >>> len(index), index.complete("hamlet/a/char/*")[:2]
+        (45, ['hamlet/a/char/c00', 'hamlet/a/char/c01'])
+    """
+
+    def __init__(self, ttl: Optional[float] = 300.0, maxsize: int = 10000):
+        self.sids: List[str] = []
+        self.searches = TTLCache(maxsize=maxsize, ttl=ttl)  # explored searches
+
+    def add(self, sids: Iterable[str]) -> None:
+        """
+        Adds the given Sid strings to the index (found by a search).
+        """
+        sids = list(sids)
+        if len(sids) < 32:
+            for sid in sids:
+                row = bisect.bisect_left(self.sids, sid)
+                if row == len(self.sids) or self.sids[row] != sid:
+                    self.sids.insert(row, sid)
+        else:
+            # the batch is sorted and merged in a single pass: the index itself is not sorted again
+            merged = []
+            for sid in heapq.merge(self.sids, sorted(set(sids))):
+                if not merged or merged[-1] != sid:
+                    merged.append(sid)
+            self.sids = merged
+
+    def set_explored(self, search: str) -> None:
+        """
+        Marks the search as explored: all its results were added to the index.
+        """
+        self.searches.put(search, True)
+
+    def explored(self, search: str) -> bool:
+        return search in self.searches
+
+    def complete(self, search: str) -> List[str]:
+        """
+        Returns the indexed Sid strings matching the given completion search, sorted.
+        """
+        if search.endswith("/**"):
+            prefix, depth = search[:-2], None
+        elif search.endswith("/*"):
+            prefix = search[:-1]
+            depth = prefix.count("/")
+        elif search == "*":
+            prefix, depth = "", 0
+        else:
+            return []
+
+        start = bisect.bisect_left(self.sids, prefix)
+        stop = bisect.bisect_left(self.sids, prefix + end, lo=start)
+        found = self.sids[start:stop]
+        if depth is not None:
+            found = [sid for sid in found if sid.count("/") == depth]
+        return found
+
+    def clear(self) -> None:
+        self.sids = []
+        self.searches.clear()
+
+    def __len__(self) -> int:
+        return len(self.sids)
@@ -5,14 +5,124 @@ This file is part of spil_ui, a UI using SPIL, The Simple Pipeline Lib.
 
 SPIL is free software and is distributed under the MIT License. See LICENCE file.
 """
+from typing import Any, Optional
+
+from qtpy import QtCore
+
 from spil import Sid
+from spil import logging
+from spil_ui.util.instrument import profiler
 """
 The ActionHandler is a way to add actions to the Browser.
 On each Sid selection in the browser, the ActionHandler's update method is called, with the given selection.
 The handler can then accordingly construct buttons and other features.
 See example implementation in the demo config.
+
+Selections are delivered through request_update, which coalesces rapid selection changes
+(eg. arrow keys in the version table): only the latest selection is delivered,
+after a short idle window.
+Until then, the handler is marked stale (set_stale), so it does not run actions on the previous selection.
 """
 
+log = logging.get_logger(name="spil_ui")
+
+
+class ResolveSignals(QtCore.QObject):
+    resolved = QtCore.Signal(int, object, object)  # ticket, selection, resolved
+
+
+class ResolveRunnable(QtCore.QRunnable):
+    """
+    Runs the handler's resolve step in a worker thread.
+    """
+
+    def __init__(self, ticket, handler, selection, signals):
+        super(ResolveRunnable, self).__init__()
+        self.ticket = ticket
+        self.handler = handler
+        self.selection = selection
+        self.signals = signals
+
+    def run(self) -> None:
+        try:
+            with profiler.phase("action_handler.resolve"):
+                resolved = self.handler.resolve(self.selection)
+        except Exception as ex:
+            log.error(f'Unable to resolve actions for "{self.selection}": {ex}')
+            resolved = None
+        self.signals.resolved.emit(self.ticket, self.selection, resolved)
+
+
+class UpdateDispatcher(QtCore.QObject):
+    """
+    Coalesces update requests for an ActionHandler.
+
+    Each request restarts the idle timer, only the latest selection is delivered when it times out.
+    If the handler sets "resolve_in_thread", its resolve step runs in a thread pool,
+    and results of superseded selections are dropped.
+
+    The handler is stale from the request until the latest selection is delivered.
+    """
+
+    def __init__(self, handler: "AbstractActionHandler", delay: int, parent=None):
+        super(UpdateDispatcher, self).__init__(parent)
+        self.handler = handler
+        self.selection = None
+        self.ticket = 0
+        self.stale = False
+
+        self.timer = QtCore.QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(delay)
+        self.timer.timeout.connect(self.dispatch)
+
+        self.pool = QtCore.QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        self.signals = ResolveSignals(self)
+        self.signals.resolved.connect(self.deliver)
+
+    def request(self, selection: Sid) -> None:
+        self.selection = selection
+        self.ticket += 1  # supersedes resolutions in flight
+        self.set_stale(True)
+        self.timer.start()
+
+    def dispatch(self) -> None:
+        if not self.handler.resolve_in_thread:
+            try:
+                with profiler.phase("action_handler.update"):
+                    self.handler.update(self.selection)
+            finally:
+                self.set_stale(False)
+            return
+        self.pool.start(ResolveRunnable(self.ticket, self.handler, self.selection, self.signals))
+
+    def deliver(self, ticket, selection, resolved) -> None:
+        if ticket == self.ticket:
+            try:
+                with profiler.phase("action_handler.update"):
+                    self.handler.update_resolved(selection, resolved)
+            finally:
+                self.set_stale(False)
+
+    def set_stale(self, stale: bool) -> None:
+        if stale != self.stale:
+            self.stale = stale
+            self.handler.set_stale(stale)
+
+
+def request_update(handler: Any, selection: Sid) -> None:
+    """
+    Sends the selection to the given action handler.
+    Handlers that do not subclass AbstractActionHandler (eg. they only implement init and update)
+    are updated directly, without coalescing.
+    """
+    if hasattr(handler, "request_update"):
+        handler.request_update(selection)
+    else:
+        with profiler.phase("action_handler.update"):
+            handler.update(selection)
+
 
 class AbstractActionHandler(object):
     """
@@ -31,8 +141,20 @@ class AbstractActionHandler(object):
     The ActionHandler implements Buttons (and potentially other Qt Widgets),
     and handles the Button pushes and action execution.
     The Browser only serves for browsing.
+
+    The Browser and the Bar call request_update(), which delivers the latest selection to update(),
+    after "update_delay" milliseconds without new selection.
+    An ActionHandler can split its update in two steps, by setting "resolve_in_thread" to True:
+    - resolve(selection) runs in a worker thread (eg. to find the actions, which may hit the file system)
+    - update_resolved(selection, resolved) runs in the Qt main thread (eg. to update the buttons)
+    Between the request and the update, set_stale(True) is called (eg. to disable the buttons),
+    and set_stale(False) once the update is done.
     """
 
+    update_delay = 100  # milliseconds
+    resolve_in_thread = False
+    _dispatcher: Optional[UpdateDispatcher] = None
+
     def init(self, parent_window, parent_widget, callback=None):
         """
         During Browser startup, it calls this init method.
@@ -49,13 +171,70 @@ class AbstractActionHandler(object):
         """
         pass
 
+    def request_update(self, selection: Sid) -> None:
+        """
+        Called by the Browser and the Bar each time a new Sid is selected.
+        Rapid selection changes are coalesced: only the latest selection is delivered,
+        to update(), or to resolve() and update_resolved() if "resolve_in_thread" is True.
+
+        Args:
+            selection: selected Sid instance
+
+        Returns:
+            None
+        """
+        if self._dispatcher is None:
+            self._dispatcher = UpdateDispatcher(self, self.update_delay)
+        self._dispatcher.request(selection)
+
     def update(self, selection: Sid) -> None:
         """
-        Update is called by the browser each time a new Sid is selected.
+        Update is called with the latest selected Sid (see request_update).
+
+        Args:
+            selection: selected Sid instance
+
+        Returns:
+            None
+        """
+        pass
+
+    def resolve(self, selection: Sid) -> Any:
+        """
+        Called in a worker thread, if "resolve_in_thread" is True.
+        Returns data for update_resolved, eg. the actions available for the selection.
+        Must not touch Qt widgets.
 
         Args:
             selection: selected Sid instance
 
+        Returns:
+            the resolved data, passed to update_resolved
+        """
+        return None
+
+    def update_resolved(self, selection: Sid, resolved: Any) -> None:
+        """
+        Called in the Qt main thread, with the result of resolve, if "resolve_in_thread" is True.
+
+        Args:
+            selection: selected Sid instance
+            resolved: the result of resolve(selection)
+
+        Returns:
+            None
+        """
+        self.update(selection)
+
+    def set_stale(self, stale: bool) -> None:
+        """
+        Called with True when a new selection is requested, and with False once it is updated.
+        While stale, the handler shows the actions of the previous selection,
+        and should not run them (eg. disable the buttons).
+
+        Args:
+            stale: True if the shown actions are not the ones of the latest selection
+
         Returns:
             None
         """
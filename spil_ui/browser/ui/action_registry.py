@@ -0,0 +1,101 @@
+"""
+This file is part of spil_ui, a UI using SPIL, The Simple Pipeline Lib.
+
+(C) copyright 2019-2024 Michael Haussmann, spil@xeo.info
+
+SPIL is free software and is distributed under the MIT License. See LICENCE file.
+"""
+from __future__ import annotations
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+import stat
+
+from spil import Sid
+from spil_ui.util.stat_cache import sid_stat
+
+"""
+The ActionRegistry is a simple way for ActionHandlers to find the actions available for a Sid.
+
+Actions are registered with the Sid types they apply to (basetypes and keytypes),
+and optionally the condition that the Sid is an existing file.
+
+The actions of a Sid type are resolved once, and cached by (basetype, keytype).
+The file check uses the shared stat cache (spil_ui.util.stat_cache),
+so resolving the actions of a selection is a lookup after warm-up.
+"""
+
+
+class Action(NamedTuple):
+    name: str
+    func: Callable
+    basetypes: Optional[Tuple[str, ...]] = None  # None for all
+    keytypes: Optional[Tuple[str, ...]] = None  # None for all
+    needs_file: bool = False
+
+    def applies_to(self, basetype: str, keytype: str) -> bool:
+        if self.basetypes is not None and basetype not in self.basetypes:
+            return False
+        if self.keytypes is not None and keytype not in self.keytypes:
+            return False
+        return True
+
+
+def is_file(sid: Sid) -> bool:
+    """
+    Returns True if the Sid's path is an existing file (using the shared stat cache).
+    """
+    result = sid_stat(sid)
+    return result is not None and stat.S_ISREG(result.st_mode)
+
+
+class ActionRegistry(object):
+    """
+    Registered actions, resolved by Sid type.
+    """
+
+    def __init__(self):
+        self.actions: Dict[str, Action] = {}
+        self.resolved: Dict[Tuple[str, str], List[Action]] = {}
+
+    def register(
+        self,
+        name: str,
+        func: Callable,
+        basetypes: Optional[List[str]] = None,
+        keytypes: Optional[List[str]] = None,
+        needs_file: bool = False,
+    ) -> None:
+        """
+        Registers an action. Actions are returned in registration order.
+
+        Args:
+            name: the action name (eg. the button label)
+            func: the function called with the Sid
+            basetypes: the Sid basetypes the action applies to, or None for all
+            keytypes: the Sid keytypes the action applies to, or None for all
+            needs_file: if True, the action applies only to Sids that are existing files
+        """
+        self.actions[name] = Action(
+            name,
+            func,
+            tuple(basetypes) if basetypes is not None else None,
+            tuple(keytypes) if keytypes is not None else None,
+            needs_file,
+        )
+        self.resolved = {}
+
+    def get_actions(self, sid: Sid) -> Dict[str, Callable]:
+        """
+        Returns the actions available for the given Sid, as a dictionary of name: function.
+        """
+        key = (sid.basetype, sid.keytype)
+        actions = self.resolved.get(key)
+        if actions is None:
+            actions = [action for action in self.actions.values() if action.applies_to(*key)]
+            self.resolved[key] = actions
+
+        result = {}
+        for action in actions:
+            if action.needs_file and not is_file(sid):
+                continue
+            result[action.name] = action.func
+        return result
@@ -30,13 +30,17 @@ import qtpy
 from qtpy import QtCore, QtWidgets, QtGui
 
 from spil.util.utils import uniqfy  # TODO: refactor sid history
-from spil_ui.browser.ui.qt_helper import (
-    addListWidgetItem,
-    clear_layout,
-    addTableWidgetItem,
-    table_css,
-)
-from spil import FindInAll as Finder, Sid, conf
+from spil_ui.browser.ui.qt_helper import clear_layout, table_css
+from spil_ui.browser.ui.action_handler import request_update
+from spil_ui.browser.ui.search_executor import SearchExecutor, SearchPrefetcher
+from spil_ui.browser.ui.sid_models import SidListModel, SidTableModel, SidSortProxyModel
+from spil_ui.util.sid_pool import get_sid, sid_pool
+from spil_ui.util.stat_cache import stat_cache
+from spil_ui.util.cache import TTLCache
+from spil_ui.util.instrument import profiler
+from spil_ui.engine.search_engine import edit_search, entities_search, column_search
+from spil_ui.engine.search_engine import entity_columns, versions_search, entity_item
+from spil import Sid, conf
 
 import spil.util.log as sl
 
@@ -49,11 +53,25 @@ UserRole = QtCore.Qt.UserRole
 ui_path = os.path.join(os.path.dirname(__file__), "qt/browser.ui")
 
 from spil_ui.conf import is_leaf, browser_title, get_action_handler
-from spil_ui.conf import table_bloc_columns, table_bloc_functions, extension_filters
-from spil_ui.conf import search_reset_keys, basetype_to_cut, basetype_clipped_versions
+from spil_ui.conf import table_bloc_columns, table_bloc_functions, table_bloc_formatters
+from spil_ui.conf import extension_filters
+from spil_ui.conf import search_reset_keys
 
 sid_colors = {"published": QtGui.QColor(85, 230, 85)}
 
+# Phases shown in the status bar, when profiling is enabled
+profiled_phases = [
+    "launch_search",
+    "build_entities",
+    "build_versions",
+    "find",
+    "table_bloc_functions",
+    "action_handler.update",
+]
+
+# Entity column listings, by column search Sid. Shared by Browser instances.
+entity_cache = TTLCache(maxsize=1000, ttl=120)
+
 
 class Browser(QtWidgets.QMainWindow):
     """
@@ -94,11 +112,11 @@ class Browser(QtWidgets.QMainWindow):
 
         # Init of the SearchSid: either argument, or last from history, or empty Sid
         if search:
-            search = Sid(search)
+            search = get_sid(search)
         elif self.sid_history:
-            search = Sid(self.sid_history[-1])
+            search = get_sid(self.sid_history[-1])
         else:
-            search = Sid("*")
+            search = get_sid("*")
         log.debug(search)
 
         # State filter  work / publish # FIXME: hard coded, to be changed
@@ -110,18 +128,68 @@ class Browser(QtWidgets.QMainWindow):
 
         self.init_extension_filters()
 
+        # Entity columns are reused from one search to the next (the .ui contains demo columns)
+        clear_layout(self.entities_lo)
+        self.entity_widgets = []  # column widgets, by position
+        self.column_searches = {}  # column search string, by position, for fully listed columns
+        self.listing_columns = {}  # (position, column search string), by key, for columns being listed
+        self.setting_current = False  # True while the Browser sets the current item of a column (no prefetch)
+        self.sid_widgets = OrderedDict()  # column widgets of the current search, by key
+
+        # Finder searches run in background threads
+        self.prefetcher = SearchPrefetcher(entity_cache, parent=self, resolve=entity_item)
+        self.entity_search = SearchExecutor(
+            self, cache=entity_cache, resolve=entity_item, parallel=True, prefetcher=self.prefetcher
+        )
+        self.version_search = SearchExecutor(self)
+        self.entity_search_sid = None
+        self.versions_after_entities = False
+
+        # Version table: rows are streamed into the model, the proxy keeps them sorted
+        # The files are stat once per row, and the result is shared by the table_bloc_functions
+        self.version_model = SidTableModel(
+            table_bloc_columns,
+            table_bloc_functions,
+            parent=self,
+            prepare=stat_cache.prefetch,
+            formatters=table_bloc_formatters,
+        )
+        self.version_proxy = SidSortProxyModel(self)
+        self.version_proxy.setSourceModel(self.version_model)
+        self.versions_tw.setModel(self.version_proxy)
+        self.versions_tw.sortByColumn(0, QtCore.Qt.AscendingOrder)
+        self.versions_tw.verticalHeader().setVisible(False)
+        self.versions_tw.verticalHeader().setDefaultSectionSize(30)
+        self.versions_tw.setStyleSheet(table_css)
+
+        # values are formatted at paint time: a regular repaint keeps relative times up to date
+        self.repaint_timer = QtCore.QTimer(self)
+        self.repaint_timer.setInterval(30 * 1000)
+        self.repaint_timer.timeout.connect(self.versions_tw.viewport().update)
+        self.repaint_timer.start()
+
+        # optional profiling: the phase timings are shown in the status bar (see spil_ui.util.instrument)
+        if profiler.enabled:
+            self.profile_timer = QtCore.QTimer(self)
+            self.profile_timer.setInterval(1000)
+            self.profile_timer.timeout.connect(self.show_profile)
+            self.profile_timer.start()
+
         self.current_sid = Sid()
         self.connect_events()
         self.launch_search(search)
 
     # Build / Edit UI
+    @profiler.timed()
     def boot_entities(self):
-        """Builds root part: project, type"""
-        clear_layout(self.entities_lo)
-        self.sid_widgets = OrderedDict()
-        self.versions_tw.clear()
+        """
+        Updates the entity columns and the version table for the new search.
+        The entity columns are updated incrementally (see build_entities).
+        """
+        self.version_model.clear()
         self.build_entities()
 
+    @profiler.timed()
     def build_entities(self):
         """
         Builds "Entity" (Asset or Shot) columns.
@@ -129,6 +197,11 @@ class Browser(QtWidgets.QMainWindow):
         The columns are list_widgets.
         They are build in a loop, according to the parts of the search_sid.
 
+        Columns are updated incrementally:
+        a column whose search did not change since the last search keeps its widget and data,
+        only its selection is updated. Other columns are cleared and listed again.
+        Widgets are reused by position, unused widgets are hidden.
+
         This method is followed by "build_versions".
         Build_entities stops either:
         - when there are no parts left (eg "hamlet/s/sq010" has 3 parts)
@@ -136,213 +209,231 @@ class Browser(QtWidgets.QMainWindow):
 
         It then goes to "build_versions"
         - if "/**" is in the search
+
+        The columns are given by spil_ui.engine.search_engine.entity_columns.
+        The column searches are run in the background by the entity SearchExecutor.
+        Columns are filled in "fill_entities" as results come in,
+        and "build_versions" is called in "done_entities", once all columns are listed.
         """
 
-        if "/**" in self.search.string:
-            search = Sid(self.search.string.split("/**")[0])
-        else:
-            search = self.search.copy()
+        search = entities_search(self.search)
+        columns, self.versions_after_entities = entity_columns(self.search)
+
+        self.entity_search_sid = search
+        self.sid_widgets = OrderedDict()
+        self.listing_columns = {}
+        jobs = []
 
         # traverses search_sid by key: project, type, ...
-        for key in search.fields.keys():
-
-            # if the widget already exists, we get it...
-            if self.sid_widgets.get(key):
-                list_widget = self.sid_widgets.get(key)
-
-                # need to clear entities below
-                if search.get(key) in conf.search_symbols or not self.current_sid.get(
-                    key
-                ):
-                    list_widget.clear()
-                    self.clear_entities()
+        for position, (key, column) in enumerate(columns):
+
+            list_widget = self.get_entity_widget(position, key)
+
+            if (
+                self.column_searches.get(position) == str(column)
+                and list_widget.model().rowCount()
+            ):
+                # unchanged column: we keep it, and only update the selection
+                self.select_entity(list_widget, search.get_as(key))
             else:
-                list_widget = self.create_entity_widget(key)  # ...else we create it
+                # the column search is recorded once the column is fully listed (see done_entity_column)
+                list_widget.model().clear()
+                self.column_searches.pop(position, None)
+                self.listing_columns[key] = (position, str(column))
+                jobs.append((key, column, False))
 
-            if list_widget.count():
-                continue
+        self.clear_entities()
+        self.entity_search.submit(jobs)
 
-            found = Finder().find(
-                search.get_as(key).get_with(key=key, value="*"), as_sid=False
-            )
+        """  #TODO: tab order
+        for i in range(len(self.sid_widgets))-1:
+            item.setTabOrder(self.textboxA, self.textboxB)
+            self.entities_lo.setTabOrder(self.sid_widgets)
+        """
 
-            for i in sorted(list(found)):
-                i = Sid(i)
-                # TODO: move this double check as option in the search
-                if not i.get_as(key):  # erroneous Sid
-                    continue
-                item = addListWidgetItem(list_widget, i.get_as(key), i.get(key))
-
-                if i.get_as(key) == search.get_as(key):
-                    item.setSelected(True)
-                    list_widget.setCurrentItem(item)
-                    self.current_sid = i.get_as(key)
-                    self.update_current_sid()
-
-            # list_widget.itemDoubleClicked.connect(self.select_search)
-            list_widget.itemClicked.connect(self.select_search)
-            # list_widget.itemSelectionChanged.connect(self.select_search)
-            # list_widget.setContextMenuPolicy(Qt.CustomContextMenu)
-            # list_widget.customContextMenuRequested.connect(self.openMenu)
-
-            list_widget.setFixedWidth(
-                list_widget.sizeHintForColumn(0) + 2 * list_widget.frameWidth() + 20
-            )
+    @profiler.timed()
+    def fill_entities(self, key, found):
+        """
+        Receives a batch of found items for the column of the given key,
+        and adds them to the column.
+        The items are (sid string, label) tuples, resolved in the search thread (see entity_item).
 
-            if search.get(key) in conf.search_symbols:
-                break
+        The batch is added at once (see SidListModel.add_sids), the current item is kept.
+        The item matching the search is selected, and becomes the current Sid.
+        """
+        list_widget = self.sid_widgets.get(key)
+        search = self.entity_search_sid
+        if list_widget is None or search is None:
+            return
 
-            if key == basetype_to_cut.get(search.basetype, "task"):
-                self.build_versions()
-                return
+        selected = search.get_as(key)
+        selected_string = selected.string if selected else None
+        model = list_widget.model()
+        current = list_widget.currentIndex()
+        current_string = model.sids[current.row()] if current.isValid() else None
+        model.add_sids(found)
 
-        log.debug(f"Done build_entities. - {self.search.string}")
+        if selected_string and any(sid_string == selected_string for sid_string, _ in found):
+            self.set_current_entity(list_widget, model.row(selected_string))
+            self.current_sid = selected
+            self.update_current_sid()
+        elif current_string and not list_widget.currentIndex().isValid():  # the model was reset
+            self.set_current_entity(list_widget, model.row(current_string))
 
-        if "/**" in self.search.string:
-            self.build_versions()
+    def done_entity_column(self, key):
+        """
+        Called when the column of the given key is fully listed.
+        Records the column search, so the next search keeps the column if it is unchanged.
+        Adjusts the column width.
+        """
+        listing = self.listing_columns.pop(key, None)
+        if listing:
+            position, column = listing
+            self.column_searches[position] = column
 
-        """  #TODO: tab order
-        for i in range(len(self.sid_widgets))-1:
-            item.setTabOrder(self.textboxA, self.textboxB)
-            self.entities_lo.setTabOrder(self.sid_widgets)
+        list_widget = self.sid_widgets.get(key)
+        if list_widget is None:
+            return
+
+        list_widget.setFixedWidth(
+            list_widget.sizeHintForColumn(0) + 2 * list_widget.frameWidth() + 20
+        )
+
+    def done_entities(self):
+        """
+        Called when all entity columns are listed.
+        Goes on to "build_versions" if needed.
         """
+        log.debug(f"Done build_entities. - {self.search.string}")
+
+        if self.versions_after_entities:
+            self.build_versions()
 
     # IDEA: load only last versions, with a drop-down for all versions
+    @profiler.timed()
     def build_versions(self):
         """
         Builds a table widget for the last part of the Sid.
         This method is launched after "build_entities" has finished.
 
-        The current search sid is modified to add extension and "last", as given by the checkboxes.
-        """
+        The current search sid is modified to add extension and "last", as given by the checkboxes
+        (see spil_ui.engine.search_engine.versions_search).
 
-        parent = self.versions_tw
-        parent.clear()
-
-        parent.setColumnCount(len(table_bloc_columns))
-        parent.setHorizontalHeaderLabels(table_bloc_columns)
+        The search is run in the background by the version SearchExecutor.
+        Rows are added in "fill_versions" as results come in,
+        and sorted by the table's proxy model.
+        """
 
-        parent.verticalHeader().setVisible(False)
-        parent.verticalHeader().setDefaultSectionSize(30)
+        self.version_model.clear()
 
         log.debug("build_versions start: " + self.search.string)
 
         log.debug("search on start {}".format(self.search))
 
-        if self.search:  # Untyped evaluates to False.
-
-            if "/**" in self.search.string:
-                search = self.search.string
-            else:
-                # we keep the global self.search but change fields for version, state, ext.
-                key = basetype_to_cut.get(self.search.basetype, "task")
-                if self.search.get_as(key):
-                    search = self.search.get_as(key).string + "/**"
-                else:
-                    search = None
-
-        else:
+        ext_filter = []
+        for box in self.boxes:
+            box_text = box.text()
+            if box.isChecked():
+                ext_filter.append(box_text)
+
+        searches = versions_search(
+            self.search,
+            extensions=ext_filter,
+            last=self.last_cb.isChecked(),
+            work=self.work_cb.isChecked(),
+            publish=self.publish_cb.isChecked(),
+        )
+        if not searches:
+            self.version_search.cancel()
+            return
 
-            search = self.search.string
+        shown, search = searches
+        self.input_sid_le.setText(shown)
 
-        if search:
+        log.debug("Final search: {}".format(search))
 
-            ext_filter = []
-            for box in self.boxes:
-                box_text = box.text()
-                if box.isChecked():
-                    ext_filter.append(box_text)
-
-            if "/**" in search and ext_filter:
-
-                # sid contains query ending. We put it aside, and later append it back
-                if search.count("?"):
-                    search, query = search.split("?", 1)
-                else:
-                    query = ""
-
-                search = (
-                    search.split("/**")[0]
-                    + "/**/"
-                    + ",".join(ext_filter)
-                    + ("?" + query if query else "")
-                )
+        self.version_search.submit([("versions", search, False)])
 
-            self.input_sid_le.setText(search)
+    @profiler.timed()
+    def fill_versions(self, tag, found):
+        """
+        Receives a batch of found Sid strings, and appends them to the version table.
+        Rows are shown as soon as they are found, the proxy model sorts them.
 
-            # FIXME: hard coded -> config
-            search = search + ("?version=>" if self.last_cb.isChecked() else "")
-            if self.work_cb.isChecked() and self.publish_cb.isChecked():
-                search = search + ('?state=~w,p')
-            else:
-                search = search + ('?state=~w' if self.work_cb.isChecked() else "")
-                search = search + ('?state=~p' if self.publish_cb.isChecked() else "")
-            if self.search.basetype in basetype_clipped_versions and not ext_filter:
-                search = search.replace("**", "*")
-
-            log.debug("Final search: {}".format(search))
-
-            # this option sorts Sids - # TODO profile
-            children = sorted(Finder().find(search, as_sid=True))
-            # children = sorted(list(Finder().find(search, as_sid=True)))
-            # children = sorted(list(Finder().find(search, as_sid=False)))
-            # children = list(filter(bool, [Sid(s) for s in children]))
-
-            parent.setRowCount(len(children))
-            for row, sid in enumerate(children):
-
-                # FIXME: hardcoded "p" -> config
-                # sid_color = (
-                #     sid_colors.get("published")
-                #     if sid.get_with(state="p").exists()
-                #     else None
-                # )
-                item = addTableWidgetItem(
-                    parent, sid, sid, row=row, column=0  # , fgcolor=sid_color
+        The row matching the search is selected, and becomes the current Sid.
+        """
+        first = self.version_model.append_sids(found)
+
+        # FIXME: hardcoded "p" -> config  (published Sid color)
+        for row, sid in enumerate(found, start=first):
+            # log.debug('{} // {} ?'.format(sid, self.search))
+            if sid == self.search.string:
+                index = self.version_proxy.mapFromSource(self.version_model.index(row, 0))
+                self.versions_tw.selectionModel().setCurrentIndex(
+                    index,
+                    QtCore.QItemSelectionModel.ClearAndSelect
+                    | QtCore.QItemSelectionModel.Rows,
                 )
+                self.current_sid = get_sid(sid)
+                self.update_current_sid()
 
-                for i, func in enumerate(table_bloc_functions):
-                    addTableWidgetItem(
-                        parent, sid, str(func(sid)) or "", row=row, column=i + 1
-                    )
-
-                # log.debug('{} // {} ?'.format(sid, self.search))
-                if sid == self.search:
-                    item.setSelected(True)
-                    parent.setCurrentItem(item)
-                    self.current_sid = sid
-                    self.update_current_sid()
-
-                # parent.itemClicked.connect(self.select_search)
-
-            parent.setStyleSheet(table_css)
-            parent.resizeColumnsToContents()
-            if parent.columnWidth(0) < 120:
-                parent.setColumnWidth(0, 260)
-                parent.setColumnWidth(1, 140)
-                parent.setColumnWidth(2, 100)
+    def done_versions(self):
+        """
+        Called when the version search is done.
+        Adjusts the table column widths.
+        The value columns get fixed widths, as they show a placeholder until their values are computed.
+        """
+        parent = self.versions_tw
+        parent.resizeColumnToContents(0)
+        if parent.columnWidth(0) < 120:
+            parent.setColumnWidth(0, 260)
+        widths = [140, 100]  # Size, Time
+        for column in range(1, parent.model().columnCount()):
+            parent.setColumnWidth(column, widths[column - 1] if column <= len(widths) else 120)
 
     def clear_entities(self):
         """
-        Clears entity widgets that are not in the search Sid (below the search).
-        If needed calls clear_versions. (#TODO make this code more readable)
+        Clears and hides entity widgets that are not used by the search Sid (below the search).
         """
-        skip = True
-        for key in self.sid_widgets.keys():
-            if not self.search.get(key):  # or not self.current.get(key):
-                skip = False
-            if skip:
+        for position, list_widget in enumerate(self.entity_widgets):
+            if position < len(self.sid_widgets):
                 continue
-            list_widget = self.sid_widgets.get(key)
-            list_widget.clear()
-        # if not skip:
-        self.clear_versions()
+            list_widget.model().clear()
+            list_widget.hide()
+            self.column_searches.pop(position, None)
+
+    def select_entity(self, list_widget, sid):
+        """
+        Selects the given sid in the given entity column, and makes it the current Sid.
+        Clears the selection if the sid is not in the column.
+        """
+        model = list_widget.model()
+        row = model.row(sid.string) if sid else None
+        if row is None:
+            list_widget.clearSelection()
+            return
+
+        self.set_current_entity(list_widget, row)
+        self.current_sid = sid
+        self.update_current_sid()
 
     def clear_versions(self):
         """
         Clears the "versions" table widget (the right part of the central layout)
         """
-        self.versions_tw.clear()
+        self.version_model.clear()
+
+    def refresh(self):
+        """
+        Called by the "Refresh" button.
+        Clears the cached entity listings and file metadata, and launches the current search again.
+        """
+        log.debug(f"Refresh. Dropping {entity_cache} and {stat_cache.stats}. {sid_pool}")
+        entity_cache.clear()
+        stat_cache.clear()
+        self.column_searches = {}  # forces all columns to be listed again
+        if self.search is not None:
+            self.launch_search(self.search)
 
     def set_sid_from_history(self):
         """
@@ -352,7 +443,7 @@ class Browser(QtWidgets.QMainWindow):
         selected = self.sid_history_cb.itemText(self.sid_history_cb.currentIndex())
         if selected:
             log.debug("selected " + selected)
-            self.launch_search(Sid(selected))
+            self.launch_search(get_sid(selected))
 
     def select_search(self, item=None):
         """
@@ -374,40 +465,76 @@ class Browser(QtWidgets.QMainWindow):
         if self.sender() == self.versions_tw:
             self.launch_search(sid)
         else:
-            # "sticky" mode
-            sid = Sid(sid)
-            key = sid.keytype
-            if self.search.type and key not in search_reset_keys:
-                # TODO: implement this in the Sid, and document
-                # implement option to use # .get_with(key=key, value='~' + sid.get(key))
-                search = Sid(str(self.search) + f"?{key}=~{sid.get(key)}")
-                self.launch_search(search)
-            else:
-                # "reset" mode
-                self.launch_search(sid)
+            self.launch_search(self.next_search(get_sid(sid)))
 
-    def input_search(self):
+    def next_search(self, sid):
         """
-        Called when the input sid lineEdit "input_sid_le" is triggered.
-        Launches a new search.
+        Returns the search for a click on the given sid in an entity column.
+        Either "sticky" or "reset" (see select_search).
         """
-        log.debug("input_search {}".format(self.input_sid_le.text()))
-        self.launch_search(self.input_sid_le.text())
+        # "sticky" mode
+        key = sid.keytype
+        if self.search.type and key not in search_reset_keys:
+            # TODO: implement this in the Sid, and document
+            # implement option to use # .get_with(key=key, value='~' + sid.get(key))
+            return get_sid(str(self.search) + f"?{key}=~{sid.get(key)}")
+        else:
+            # "reset" mode
+            return sid
 
-    # TODO: factorize and simplify all the xxx_search methods
-    def edit_search(self, search_sid):
+    def set_current_entity(self, list_widget, row):
         """
-        If the search has no searchers ("*", ",", ...) it needs edit.
+        Sets the current item of an entity column, without prefetch (see prefetch_entities).
         """
-        # we check this first, because the Sid might not be typed.
-        if search_sid.is_search():
-            return search_sid
+        self.setting_current = True
+        try:
+            list_widget.setCurrentIndex(list_widget.model().index(row))
+        finally:
+            self.setting_current = False
 
-        if is_leaf(search_sid):
-            return search_sid
+    def prefetch_entities(self, index, previous=None):
+        """
+        Called when an entity column item is hovered, or becomes current by keyboard navigation
+        (not when the Browser sets it, see set_current_entity).
 
-        return Sid(str(search_sid) + "/*")
+        For the item and its neighbours, predicts the search a click would launch,
+        and lists the next column in the background, so it is cached when the click comes.
+        Columns the current entity search is listing are skipped.
+        """
+        model = index.model()
+        if model is None or self.search is None or self.setting_current:
+            return
+        listing = {column for _, column in self.listing_columns.values()}
+
+        searches = []
+        for row in (index.row(), index.row() + 1, index.row() - 1):
+            if not 0 <= row < model.rowCount():
+                continue
+            sid = model.index(row).data(UserRole)
+            search = edit_search(self.next_search(sid))
+            if is_leaf(search):
+                continue
+            search = entities_search(search)
+            keys = list(search.fields.keys())
+            if sid.keytype not in keys or keys[-1] == sid.keytype:
+                continue
+            child_key = keys[keys.index(sid.keytype) + 1]
+            column = column_search(search, child_key)
+            if str(column) in listing:
+                continue
+            searches.append((child_key, column, False))
 
+        self.prefetcher.prefetch(searches)
+
+    def input_search(self):
+        """
+        Called when the input sid lineEdit "input_sid_le" is triggered.
+        Launches a new search.
+        """
+        log.debug("input_search {}".format(self.input_sid_le.text()))
+        self.launch_search(self.input_sid_le.text())
+
+    @profiler.timed()
     def launch_search(self, search_sid):
         """
         Main entry point for a new search.
@@ -425,7 +552,7 @@ class Browser(QtWidgets.QMainWindow):
         - calls boot_entities: triggers UI update with the new columns, table, buttons
         """
         log.debug("New search cycle: " + str(search_sid))
-        search_sid = Sid(search_sid)
+        search_sid = get_sid(search_sid)
 
         # if it is a leaf (typically a file), we keep the current search as long as it matches
         if is_leaf(search_sid) and search_sid.match(self.search):
@@ -436,8 +563,12 @@ class Browser(QtWidgets.QMainWindow):
             self.update_current_sid()
             return
 
+        # a new search cycle starts: searches in flight are obsolete
+        self.entity_search.cancel()
+        self.version_search.cancel()
+
         # check if the search needs update
-        search_sid = self.edit_search(search_sid)
+        search_sid = edit_search(search_sid)
         self.search = search_sid
         self.input_sid_le.setText(self.search.string)
 
@@ -447,12 +578,12 @@ class Browser(QtWidgets.QMainWindow):
         """
         The current Sid is the one selected, seen at the top center of the UI.
         When it is updated, this method updates the Qt label,
-        and calls the ActionHandlers update() method.
+        and sends it to the ActionHandler (see action_handler.request_update).
         """
         self.current_sid_lb.setText(self.current_sid.string)
         if self.current_sid != self.previous_sid:
             self.previous_sid = self.current_sid
-            self.action_handler.update(self.current_sid)
+            request_update(self.action_handler, self.current_sid)
 
     def init_extension_filters(self):
         """
@@ -470,7 +601,7 @@ class Browser(QtWidgets.QMainWindow):
         for ext in filters:
             box = QtWidgets.QCheckBox(ext, self)
             box.setObjectName("ext_" + ext)
-            box.clicked.connect(self.build_versions)
+            box.clicked.connect(lambda: self.build_versions())
             vbox.addWidget(box)
             self.boxes.append(box)
 
@@ -479,16 +610,47 @@ class Browser(QtWidgets.QMainWindow):
         self.engine_la.addWidget(groupBox)
 
     # Utils
+    def get_entity_widget(self, position, key):
+        """
+        Returns the Entity column widget at the given position, for the given key.
+        The widget is reused if it exists, else it is created.
+        """
+        if position < len(self.entity_widgets):
+            list_widget = self.entity_widgets[position]
+            list_widget.setObjectName(key)
+            list_widget.show()
+        else:
+            list_widget = self.create_entity_widget(key)
+            self.entity_widgets.append(list_widget)
+        self.sid_widgets[key] = list_widget
+        return list_widget
+
+    @profiler.timed()
     def create_entity_widget(self, key):
         """
         Utility to create an Entity column widget list.
         """
-        list_widget = QtWidgets.QListWidget()
+        list_widget = QtWidgets.QListView()
         list_widget.setObjectName(key)
+        list_widget.setModel(SidListModel(list_widget))
+        list_widget.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        # list_widget.doubleClicked.connect(self.select_search)
+        list_widget.clicked.connect(self.select_search)
+        list_widget.setMouseTracking(True)
+        list_widget.entered.connect(self.prefetch_entities)
+        list_widget.selectionModel().currentChanged.connect(self.prefetch_entities)
+        # list_widget.selectionModel().selectionChanged.connect(self.select_search)
+        # list_widget.setContextMenuPolicy(Qt.CustomContextMenu)
+        # list_widget.customContextMenuRequested.connect(self.openMenu)
         self.entities_lo.addWidget(list_widget)
-        self.sid_widgets[key] = list_widget
         return list_widget
 
+    def show_profile(self):
+        """
+        Shows the phase timings in the status bar, when profiling is enabled.
+        """
+        self.statusBar().showMessage(profiler.summary(profiled_phases))
+
     def fill_history(self, sid=None):
         """
         Fills the "history" combo box containing last used Sids.
@@ -520,10 +682,16 @@ class Browser(QtWidgets.QMainWindow):
     def connect_events(self):
         self.input_sid_le.returnPressed.connect(self.input_search)
         self.sid_history_cb.currentIndexChanged.connect(self.set_sid_from_history)
-        self.versions_tw.itemClicked.connect(self.select_search)
-        self.last_cb.clicked.connect(self.build_versions)
-        self.publish_cb.clicked.connect(self.build_versions)
-        self.work_cb.clicked.connect(self.build_versions)
+        self.versions_tw.clicked.connect(self.select_search)
+        self.last_cb.clicked.connect(lambda: self.build_versions())
+        self.publish_cb.clicked.connect(lambda: self.build_versions())
+        self.work_cb.clicked.connect(lambda: self.build_versions())
+        self.refresh_pb.clicked.connect(self.refresh)
+        self.entity_search.found.connect(self.fill_entities)
+        self.entity_search.done.connect(self.done_entity_column)
+        self.entity_search.finished.connect(self.done_entities)
+        self.version_search.found.connect(self.fill_versions)
+        self.version_search.finished.connect(self.done_versions)
         # QtWidgets.QShortcut(QtCore.Qt.Key_Up, self.centralwidget, self.select_search)  # TODO: arrow keys in listwidgets
 
     def showEvent(self, arg=None):
@@ -538,11 +706,18 @@ class Browser(QtWidgets.QMainWindow):
         """
         When the window is closed.
         Persists the last used Sid history list to the user config.
+        Cancels searches in flight.
+        Writes the profile, if profiling is enabled.
         """
+        self.entity_search.cancel()
+        self.version_search.cancel()
+        self.prefetcher.cancel()
         try:
             conf.set("sid_usage_history", self.sid_history)
         except Exception:
             pass
+        if profiler.enabled:
+            log.info(f"Profile written to {profiler.dump()}")
 
 
 def open_browser(
@@ -0,0 +1,422 @@
+"""
+This file is part of spil_ui, a UI using SPIL, The Simple Pipeline Lib.
+
+(C) copyright 2019-2024 Michael Haussmann, spil@xeo.info
+
+SPIL_UI is free software and is distributed under the MIT License. See LICENSE file.
+"""
+from __future__ import annotations
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+"""
+The SearchExecutor runs Finder searches off the GUI thread.
+
+A search is submitted as a list of jobs: (tag, search, as_sid).
+The jobs run in a QThreadPool worker, and the results are streamed back
+to the GUI thread in batches, through Qt signals.
+
+Submitting a new search cancels the one in flight.
+Results of a cancelled search are never emitted.
+
+Optionally, the jobs of a search run in parallel (eg. the listings of all entity columns),
+in a shared thread pool. Their results are still emitted in the jobs order,
+each job once it is complete.
+
+Optionally, each result is resolved in the worker, by a "resolve" function,
+so that the GUI thread receives ready to use items (eg. a Sid string and its label),
+and results are parsed only once. Results resolved to None are dropped.
+
+Optionally, job results are kept in a cache (a TTLCache), by search string.
+Cached jobs are answered without calling the Finder.
+If a resolve function is given, the resolved results are cached.
+
+The SearchPrefetcher runs searches speculatively, only to fill that cache.
+If a search is being prefetched when the SearchExecutor runs it, the SearchExecutor waits for the prefetch,
+and reads the results from the cache. A queued prefetch is dropped, and the search runs as usual.
+"""
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
+import threading
+
+from qtpy import QtCore
+
+from spil import FindInAll as Finder
+from spil import logging
+from spil_ui.engine.search_engine import collect, Resolve
+from spil_ui.util.cache import TTLCache, MISSING
+from spil_ui.util.instrument import profiler
+
+log = logging.get_logger(name="spil_ui")
+
+SearchJob = Tuple[Any, Any, bool]
+
+max_workers = 8  # threads running parallel jobs
+_executor = None
+
+
+def get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="spil_ui_search"
+        )
+    return _executor
+
+
+class SearchSignals(QtCore.QObject):
+    """
+    Signals emitted from the worker thread.
+    Each signal carries the ticket of the search it belongs to.
+    """
+
+    found = QtCore.Signal(int, object, object)  # ticket, tag, results
+    done = QtCore.Signal(int, object)  # ticket, tag
+    failed = QtCore.Signal(int, object, str)  # ticket, tag, error
+    finished = QtCore.Signal(int)  # ticket
+
+
+class SearchRunnable(QtCore.QRunnable):
+    """
+    Runs the given jobs in sequence, and emits the results by batch.
+    Checks for cancellation between each found result.
+
+    If parallel is True, the jobs run concurrently in the shared thread pool (see get_executor),
+    and the results of each job are emitted when it is complete, in the jobs order.
+
+    If a cache is given, cached results are emitted directly, and new results are cached.
+    If a prefetcher is given, a search it is running is not run again (see SearchPrefetcher.wait).
+    """
+
+    def __init__(
+        self,
+        ticket: int,
+        jobs: List[SearchJob],
+        signals: SearchSignals,
+        batch_size: int,
+        cache: Optional[TTLCache] = None,
+        resolve: Optional[Resolve] = None,
+        parallel: bool = False,
+        prefetcher: Optional[SearchPrefetcher] = None,
+    ):
+        super(SearchRunnable, self).__init__()
+        self.ticket = ticket
+        self.jobs = jobs
+        self.signals = signals
+        self.batch_size = batch_size
+        self.cache = cache
+        self.resolve = resolve
+        self.parallel = parallel
+        self.prefetcher = prefetcher
+        self.cancelled = threading.Event()
+        self.futures: List[Future] = []  # parallel jobs
+
+    def cancel(self) -> None:
+        """
+        Stops the search: parallel jobs that have not started are dropped from the shared thread pool.
+        """
+        self.cancelled.set()
+        for future in self.futures:
+            future.cancel()
+
+    def run(self) -> None:
+        try:
+            if self.parallel and len(self.jobs) > 1:
+                self.run_parallel()
+                return
+            finder = Finder()
+            for tag, search, as_sid in self.jobs:
+                if self.cancelled.is_set():
+                    return
+                self.run_job(finder, tag, search, as_sid)
+        finally:
+            try:
+                self.signals.finished.emit(self.ticket)
+            except RuntimeError:  # the signals were deleted: the application quit
+                pass
+
+    def run_parallel(self) -> None:
+        try:
+            self.futures = futures = [
+                get_executor().submit(self.collect, search, as_sid, tag)
+                for tag, search, as_sid in self.jobs
+            ]
+        except RuntimeError as ex:  # the interpreter is shutting down
+            log.debug(f"Search not started: {ex}")
+            return
+        try:
+            for (tag, search, as_sid), future in zip(self.jobs, futures):
+                if self.cancelled.is_set():  # also if cancelled before the futures were set
+                    return
+                try:
+                    results = future.result()
+                except CancelledError:
+                    return
+                except Exception as ex:
+                    log.error(f'Search failed for "{search}": {ex}')
+                    self.signals.failed.emit(self.ticket, tag, str(ex))
+                    continue
+                if results is None or self.cancelled.is_set():
+                    return
+                self.emit_results(tag, results)
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def collect(self, search: Any, as_sid: bool, tag: Any) -> Optional[List[Any]]:
+        """
+        Returns all (resolved) results of the search, from the cache or the Finder.
+        Returns None if the search was cancelled.
+        """
+        self.wait_prefetch(search, as_sid)
+        return collect(search, as_sid, tag, self.cache, self.resolve, self.cancelled)
+
+    def wait_prefetch(self, search: Any, as_sid: bool) -> None:
+        if self.prefetcher is not None and self.cache is not None:
+            self.prefetcher.wait((str(search), as_sid), self.cancelled)
+
+    def emit_results(self, tag: Any, results: List[Any]) -> None:
+        for i in range(0, len(results), self.batch_size):
+            self.signals.found.emit(self.ticket, tag, results[i : i + self.batch_size])
+        self.signals.done.emit(self.ticket, tag)
+
+    def run_job(self, finder: Finder, tag: Any, search: Any, as_sid: bool) -> None:
+        key = (str(search), as_sid)
+        self.wait_prefetch(search, as_sid)
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not MISSING:
+                self.emit_results(tag, cached)
+                return
+
+        results = []
+        batch = []
+        try:
+            with profiler.phase("find"):
+                for result in finder.find(search, as_sid=as_sid):
+                    if self.cancelled.is_set():
+                        return
+                    if self.resolve:
+                        result = self.resolve(tag, result)
+                        if result is None:
+                            continue
+                    batch.append(result)
+                    if len(batch) >= self.batch_size:
+                        self.signals.found.emit(self.ticket, tag, batch)
+                        results.extend(batch)
+                        batch = []
+        except Exception as ex:
+            log.error(f'Search failed for "{search}": {ex}')
+            self.signals.failed.emit(self.ticket, tag, str(ex))
+            return
+
+        if batch:
+            self.signals.found.emit(self.ticket, tag, batch)
+            results.extend(batch)
+        if self.cache is not None:
+            self.cache.put(key, results)
+        self.signals.done.emit(self.ticket, tag)
+
+
+class SearchExecutor(QtCore.QObject):
+    """
+    Submits searches to a thread pool and re-emits the results of the current search only.
+
+    Signals:
+        found(tag, results): a batch of results for the job with the given tag
+        done(tag): the job with the given tag has no more results
+        failed(tag, error): the job with the given tag raised an error
+        finished(): all jobs of the current search are done
+
+    If a cache is given, job results are cached by search string.
+    If a resolve function is given, results are resolved in the worker thread (see module doc).
+    If parallel is True, the jobs of a search run concurrently (see SearchRunnable).
+    If a prefetcher is given (sharing the cache), searches it is running are not run twice.
+    """
+
+    found = QtCore.Signal(object, object)
+    done = QtCore.Signal(object)
+    failed = QtCore.Signal(object, str)
+    finished = QtCore.Signal()
+
+    def __init__(
+        self, parent=None, pool=None, batch_size=100, cache=None, resolve=None, parallel=False, prefetcher=None
+    ):
+        super(SearchExecutor, self).__init__(parent)
+        self.pool = pool or QtCore.QThreadPool.globalInstance()
+        self.batch_size = batch_size
+        self.cache = cache
+        self.resolve = resolve
+        self.parallel = parallel
+        self.prefetcher = prefetcher
+        self.ticket = 0
+        self.running: Dict[int, SearchRunnable] = {}  # keeps runnables alive until they finish
+
+        self.signals = SearchSignals(self)
+        self.signals.found.connect(self._on_found)
+        self.signals.done.connect(self._on_done)
+        self.signals.failed.connect(self._on_failed)
+        self.signals.finished.connect(self._on_finished)
+
+    def submit(self, jobs: Iterable[SearchJob]) -> int:
+        """
+        Cancels the current search, and starts a new one with the given jobs.
+
+        Args:
+            jobs: iterable of (tag, search, as_sid) tuples, run in the given order
+
+        Returns:
+            the ticket of the new search
+        """
+        self.cancel()
+        runnable = SearchRunnable(
+            self.ticket,
+            list(jobs),
+            self.signals,
+            self.batch_size,
+            cache=self.cache,
+            resolve=self.resolve,
+            parallel=self.parallel,
+            prefetcher=self.prefetcher,
+        )
+        self.running[self.ticket] = runnable
+        self.pool.start(runnable)
+        return self.ticket
+
+    def cancel(self) -> None:
+        """
+        Cancels the search in flight, if any.
+        Pending results of the cancelled search are dropped.
+        """
+        runnable = self.running.get(self.ticket)
+        if runnable:
+            runnable.cancel()
+        self.ticket += 1
+
+    def is_running(self) -> bool:
+        return self.ticket in self.running
+
+    def _on_found(self, ticket, tag, results):
+        if ticket == self.ticket:
+            self.found.emit(tag, results)
+
+    def _on_done(self, ticket, tag):
+        if ticket == self.ticket:
+            self.done.emit(tag)
+
+    def _on_failed(self, ticket, tag, error):
+        if ticket == self.ticket:
+            self.failed.emit(tag, error)
+
+    def _on_finished(self, ticket):
+        self.running.pop(ticket, None)
+        if ticket == self.ticket:
+            self.finished.emit()
+
+
+class PrefetchRunnable(QtCore.QRunnable):
+    """
+    Runs a search, and stores its (resolved) results in the cache.
+    """
+
+    def __init__(self, tag: Any, search: Any, as_sid: bool, prefetcher: SearchPrefetcher):
+        super(PrefetchRunnable, self).__init__()
+        self.tag = tag
+        self.search = search
+        self.as_sid = as_sid
+        self.prefetcher = prefetcher
+        self.started = False
+        self.claimed = False  # the search is run by a SearchExecutor instead
+        self.finished = threading.Event()
+
+    def run(self) -> None:
+        key = (str(self.search), self.as_sid)
+        resolve = self.prefetcher.resolve
+        with self.prefetcher.lock:
+            if self.claimed:
+                self.finished.set()
+                return
+            self.started = True
+        try:
+            results = Finder().find(self.search, as_sid=self.as_sid)
+            if resolve:
+                results = (resolve(self.tag, result) for result in results)
+                results = [result for result in results if result is not None]
+            self.prefetcher.cache.put(key, list(results))
+        except Exception as ex:
+            log.debug(f'Prefetch failed for "{self.search}": {ex}')
+        finally:
+            self.prefetcher.done(key, self)
+            self.finished.set()
+
+
+class SearchPrefetcher(object):
+    """
+    Speculatively runs searches in background threads, to fill a cache shared with a SearchExecutor.
+    Typically used to list the next entity column, before the user clicks.
+
+    Searches that are cached or already running are skipped,
+    and at most "max_pending" searches are queued.
+
+    The resolve function must be the one of the SearchExecutor sharing the cache.
+    """
+
+    def __init__(
+        self, cache: TTLCache, parent=None, max_threads=2, max_pending=8, resolve=None
+    ):
+        self.cache = cache
+        self.resolve = resolve
+        self.pool = QtCore.QThreadPool(parent)
+        self.pool.setMaxThreadCount(max_threads)
+        self.max_pending = max_pending
+        self.pending: Dict[Tuple[str, bool], PrefetchRunnable] = {}
+        self.lock = threading.Lock()
+
+    def prefetch(self, jobs: Iterable[SearchJob]) -> None:
+        """
+        Queues the given jobs: (tag, search, as_sid) tuples, like SearchExecutor.submit.
+        """
+        for tag, search, as_sid in jobs:
+            key = (str(search), as_sid)
+            with self.lock:
+                if key in self.pending:
+                    continue
+                if len(self.pending) >= self.max_pending:
+                    return
+            if self.cache.get(key) is not MISSING:
+                continue
+            runnable = PrefetchRunnable(tag, search, as_sid, self)
+            with self.lock:
+                self.pending[key] = runnable
+            log.debug(f'Prefetching "{search}"')
+            self.pool.start(runnable)
+
+    def done(self, key: Tuple[str, bool], runnable: PrefetchRunnable) -> None:
+        with self.lock:
+            if self.pending.get(key) is runnable:
+                del self.pending[key]
+
+    def wait(self, key: Tuple[str, bool], cancelled: Optional[threading.Event] = None) -> None:
+        """
+        Called by a SearchExecutor worker before it runs a search.
+        If the search is being prefetched, waits until it is done (its results are then cached),
+        or until the given event is set.
+        If the search is queued, the prefetch is dropped: the caller runs it.
+        """
+        with self.lock:
+            runnable = self.pending.get(key)
+            if runnable is None:
+                return
+            if not runnable.started:
+                runnable.claimed = True
+                del self.pending[key]
+                return
+        while not runnable.finished.wait(0.05):
+            if cancelled is not None and cancelled.is_set():
+                return
+
+    def cancel(self) -> None:
+        """
+        Drops the queued searches that have not started yet.
+        """
+        self.pool.clear()
+        with self.lock:
+            self.pending.clear()
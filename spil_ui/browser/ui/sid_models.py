@@ -0,0 +1,452 @@
+"""
+This file is part of spil_ui, a UI using SPIL, The Simple Pipeline Lib.
+
+(C) copyright 2019-2024 Michael Haussmann, spil@xeo.info
+
+SPIL_UI is free software and is distributed under the MIT License. See LICENSE file.
+"""
+from __future__ import annotations
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+from array import array
+from math import isnan, nan
+import bisect
+import time
+
+"""
+Qt item models for the Browser.
+
+The entity columns are QListViews showing a SidListModel.
+The version table is a QTableView showing a SidTableModel through a SidSortProxyModel.
+
+The models store Sids as strings, in flat lists, and values in column arrays.
+Display data and Sid objects are only created on demand, in data().
+The version table column values are computed in a thread pool, only for the rows that are shown.
+
+Rows are appended by batches, while the search is still running,
+and the proxy model keeps them sorted.
+"""
+from qtpy import QtCore
+
+from spil import Sid
+from spil import logging
+from spil_ui.util.sid_pool import get_sid
+from spil_ui.util.instrument import profiler
+
+log = logging.get_logger(name="spil_ui")
+
+UserRole = QtCore.Qt.UserRole
+SortRole = QtCore.Qt.UserRole + 1
+DisplayRole = QtCore.Qt.DisplayRole
+
+Column = Union[array, List[Any]]
+
+NOT_LOADED, PENDING, LOADED = 0, 1, 2  # row value states
+placeholder = "..."  # shown while the row values are computed
+
+
+def is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def is_missing(value: Any) -> bool:
+    """
+    Returns True for a value that was not computed (NaN, or None).
+    """
+    return value is None or (isinstance(value, float) and isnan(value))
+
+
+def to_label(value: Any) -> str:
+    """
+    Returns the label of a value without formatter.
+    Values are stored as floats in the column arrays: integral values are shown as integers.
+    """
+    if is_missing(value):
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def set_column_value(column: Column, row: int, value: Any) -> Column:
+    """
+    Sets the value of the given row.
+    A float array is turned into a list, if the value is not a number.
+
+    Returns:
+        the column (which may be a new list)
+    """
+    if isinstance(column, array) and not is_number(value):
+        column = column.tolist()
+    column[row] = value
+    return column
+
+
+class SidListModel(QtCore.QAbstractListModel):
+    """
+    Sorted list of Sids, for an entity column.
+    Each row shows a label (typically the value of the column's key).
+    """
+
+    def __init__(self, parent: Optional[QtCore.QObject] = None):
+        super(SidListModel, self).__init__(parent)
+        self.sids: List[str] = []
+        self.labels: List[str] = []
+
+    def clear(self) -> None:
+        self.beginResetModel()
+        self.sids = []
+        self.labels = []
+        self.endResetModel()
+
+    def add_sid(self, sid: str, label: str) -> int:
+        """
+        Inserts the given Sid string at its sorted position.
+
+        Returns:
+            the row of the inserted Sid
+        """
+        row = bisect.bisect(self.sids, sid)
+        self.beginInsertRows(QtCore.QModelIndex(), row, row)
+        self.sids.insert(row, sid)
+        self.labels.insert(row, label)
+        self.endInsertRows()
+        return row
+
+    def add_sids(self, items: Iterable[Tuple[str, str]]) -> None:
+        """
+        Adds a batch of (sid string, label) items, at their sorted positions.
+        The batch is sorted and merged at once, with a single model signal:
+        rows are appended if they all sort after the existing rows, else the model is reset.
+        """
+        items = sorted(items)
+        if not items:
+            return
+        if self.sids and self.sids[-1] <= items[0][0]:
+            first = len(self.sids)
+            self.beginInsertRows(QtCore.QModelIndex(), first, first + len(items) - 1)
+            self.sids.extend(sid for sid, _ in items)
+            self.labels.extend(label for _, label in items)
+            self.endInsertRows()
+            return
+
+        self.beginResetModel()
+        if len(items) * 16 < len(self.sids):  # small batch: inserted in place
+            for sid, label in items:
+                row = bisect.bisect(self.sids, sid)
+                self.sids.insert(row, sid)
+                self.labels.insert(row, label)
+        else:  # both lists are sorted runs: the sort merges them
+            merged = sorted(list(zip(self.sids, self.labels)) + items)
+            self.sids = [sid for sid, _ in merged]
+            self.labels = [label for _, label in merged]
+        self.endResetModel()
+
+    def row(self, sid: str) -> Optional[int]:
+        """
+        Returns the row of the given Sid string, or None.
+        """
+        row = bisect.bisect_left(self.sids, sid)
+        if row < len(self.sids) and self.sids[row] == sid:
+            return row
+        return None
+
+    def rowCount(self, parent=QtCore.QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        return len(self.sids)
+
+    def data(self, index, role=DisplayRole):
+        if not index.isValid():
+            return None
+
+        if role == DisplayRole:
+            return self.labels[index.row()]
+        if role == UserRole:
+            return get_sid(self.sids[index.row()])
+
+        return None
+
+
+class ValueSignals(QtCore.QObject):
+    loaded = QtCore.Signal(int, int, object, object)  # job, generation, rows, values
+
+
+class ValueRunnable(QtCore.QRunnable):
+    """
+    Computes the column values of the given rows, in a worker thread.
+    """
+
+    def __init__(self, job, generation, rows, sids, functions, prepare, signals):
+        super(ValueRunnable, self).__init__()
+        self.job = job
+        self.generation = generation
+        self.rows = rows
+        self.sids = sids
+        self.functions = functions
+        self.prepare = prepare
+        self.signals = signals
+
+    def run(self) -> None:
+        sids = [get_sid(sid) for sid in self.sids]
+        if self.prepare:
+            try:
+                with profiler.phase("table_prepare"):
+                    self.prepare(sids)
+            except Exception as ex:
+                log.debug(f'Unable to prepare "{self.prepare}": {ex}')
+
+        values = []
+        with profiler.phase("table_bloc_functions"):
+            for sid in sids:
+                row_values = []
+                for func in self.functions:
+                    try:
+                        row_values.append(func(sid))
+                    except Exception as ex:
+                        log.debug(f'Unable to compute "{func}" for "{sid}": {ex}')
+                        row_values.append(nan)
+                values.append(row_values)
+        self.signals.loaded.emit(self.job, self.generation, self.rows, values)
+
+
+class SidTableModel(QtCore.QAbstractTableModel):
+    """
+    Table of Sids.
+    The first column shows the Sid, the other columns show the results of the given functions.
+    If a formatter is given for a column, the raw values are stored, and formatted at paint time.
+    A formatter receives a list of values and returns a list of labels:
+    all loaded rows of the column are formatted at once, and labels are refreshed after "label_ttl" seconds.
+
+    The functions are evaluated lazily: only for the rows the view asks data for (the visible rows),
+    in a thread pool. A placeholder is shown until the values are computed.
+
+    The optional "prepare" function receives the Sids of a chunk of rows, before the functions are called.
+    It is a batch stage, typically used to fetch data the functions share (eg. the files stat).
+
+    Every cell returns the row Sid for the UserRole.
+    """
+
+    def __init__(
+        self,
+        columns: List[str],
+        functions: List[Callable[[Sid], Any]],
+        parent: Optional[QtCore.QObject] = None,
+        pool: Optional[QtCore.QThreadPool] = None,
+        chunk_size: int = 50,
+        prepare: Optional[Callable[[List[Sid]], None]] = None,
+        formatters: Optional[List[Optional[Callable[[List[Any]], List[str]]]]] = None,
+        label_ttl: float = 30.0,
+    ):
+        super(SidTableModel, self).__init__(parent)
+        self.columns = columns
+        self.functions = functions
+        self.prepare = prepare
+        self.formatters = list(formatters or [])
+        self.formatters += [None] * (len(functions) - len(self.formatters))
+        self.sids: List[str] = []
+        self.values: List[Column] = [array("d") for _ in functions]
+        self.states = bytearray()
+        self.labels: List[List[Optional[str]]] = [[] for _ in functions]
+        self.unformatted: List[List[int]] = [[] for _ in functions]  # loaded rows without label
+        self.label_ttl = label_ttl
+        self.labels_time = time.monotonic()
+
+        if pool is None:
+            pool = QtCore.QThreadPool(self)
+            pool.setMaxThreadCount(4)
+        self.pool = pool
+        self.chunk_size = chunk_size
+        self.generation = 0
+        self.job = 0
+        self.running: Dict[int, ValueRunnable] = {}
+        self.requested: List[int] = []
+
+        self.request_timer = QtCore.QTimer(self)
+        self.request_timer.setSingleShot(True)
+        self.request_timer.setInterval(0)
+        self.request_timer.timeout.connect(self.load_requested)
+
+        self.signals = ValueSignals(self)
+        self.signals.loaded.connect(self.set_values)
+
+    def clear(self) -> None:
+        self.beginResetModel()
+        self.generation += 1
+        self.sids = []
+        self.values = [array("d") for _ in self.functions]
+        self.states = bytearray()
+        self.labels = [[] for _ in self.functions]
+        self.unformatted = [[] for _ in self.functions]
+        self.requested = []
+        self.endResetModel()
+
+    def append_sids(self, sids: Iterable[str]) -> int:
+        """
+        Appends rows for the given Sid strings.
+        Their values are computed later, when they are shown.
+
+        Returns:
+            the row of the first appended Sid
+        """
+        sids = list(sids)
+        first = len(self.sids)
+        if not sids:
+            return first
+
+        self.beginInsertRows(QtCore.QModelIndex(), first, first + len(sids) - 1)
+        self.sids.extend(sids)
+        for column in self.values:
+            column.extend([nan] * len(sids))
+        for labels in self.labels:
+            labels.extend([None] * len(sids))
+        self.states.extend(bytes(len(sids)))
+        self.endInsertRows()
+        return first
+
+    def request(self, row: int) -> None:
+        """
+        Marks the row for value loading.
+        Requested rows are loaded together, once control returns to the event loop.
+        """
+        self.states[row] = PENDING
+        self.requested.append(row)
+        if not self.request_timer.isActive():
+            self.request_timer.start()
+
+    def load_requested(self) -> None:
+        """
+        Starts the computation of the requested rows, by chunks, in the thread pool.
+        """
+        rows, self.requested = self.requested, []
+        for i in range(0, len(rows), self.chunk_size):
+            chunk = rows[i : i + self.chunk_size]
+            self.job += 1
+            runnable = ValueRunnable(
+                self.job,
+                self.generation,
+                chunk,
+                [self.sids[row] for row in chunk],
+                self.functions,
+                self.prepare,
+                self.signals,
+            )
+            self.running[self.job] = runnable
+            self.pool.start(runnable)
+
+    def set_values(self, job, generation, rows, values) -> None:
+        """
+        Receives computed values, and updates the view.
+        Values of a previous generation (before the last clear) are dropped.
+        """
+        self.running.pop(job, None)
+        if generation != self.generation or not rows:
+            return
+
+        for row, row_values in zip(rows, values):
+            for i, value in enumerate(row_values):
+                self.values[i] = set_column_value(self.values[i], row, value)
+                self.labels[i][row] = None
+            self.states[row] = LOADED
+        for unformatted in self.unformatted:
+            unformatted.extend(rows)
+
+        self.dataChanged.emit(
+            self.index(min(rows), 1), self.index(max(rows), len(self.columns) - 1)
+        )
+
+    def format_column(self, i: int) -> None:
+        """
+        Formats the labels of all loaded rows of the value column i that have no label yet,
+        with a single call to the column formatter.
+        Missing values (the function failed) are not formatted, and get an empty label.
+        """
+        rows, self.unformatted[i] = self.unformatted[i], []
+        if not rows:
+            return
+        column = self.values[i]
+        valid = []
+        for row in rows:
+            if is_missing(column[row]):
+                self.labels[i][row] = ""
+            else:
+                valid.append(row)
+        if not valid:
+            return
+        labels = self.formatters[i]([column[row] for row in valid])
+        for row, label in zip(valid, labels):
+            self.labels[i][row] = label
+
+    def expire_labels(self) -> None:
+        """
+        Drops all labels, so they are formatted again (eg. relative times "3 minutes ago").
+        """
+        loaded = [row for row, state in enumerate(self.states) if state == LOADED]
+        self.labels = [[None] * len(self.sids) for _ in self.functions]
+        self.unformatted = [list(loaded) for _ in self.functions]
+        self.labels_time = time.monotonic()
+
+    def sid(self, row: int) -> Sid:
+        return get_sid(self.sids[row])
+
+    def rowCount(self, parent=QtCore.QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        return len(self.sids)
+
+    def columnCount(self, parent=QtCore.QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        return len(self.columns)
+
+    def data(self, index, role=DisplayRole):
+        if not index.isValid():
+            return None
+
+        row, column = index.row(), index.column()
+        if role == UserRole:
+            return get_sid(self.sids[row])
+
+        if column == 0:
+            if role in (DisplayRole, SortRole):
+                return self.sids[row]
+            return None
+
+        if role not in (DisplayRole, SortRole):
+            return None
+
+        if self.states[row] == NOT_LOADED:
+            self.request(row)
+
+        i = column - 1
+        if role == SortRole:
+            return self.values[i][row]  # NaN until loaded
+
+        if self.states[row] != LOADED:
+            return placeholder
+
+        if not self.formatters[i]:
+            return to_label(self.values[i][row])
+
+        if time.monotonic() - self.labels_time > self.label_ttl:
+            self.expire_labels()
+        if self.labels[i][row] is None:
+            self.format_column(i)
+        return self.labels[i][row] or ""
+
+    def headerData(self, section, orientation, role=DisplayRole):
+        if role == DisplayRole and orientation == QtCore.Qt.Horizontal:
+            if section < len(self.columns):
+                return self.columns[section]
+        return None
+
+
+class SidSortProxyModel(QtCore.QSortFilterProxyModel):
+    """
+    Sorts the rows of a Sid model, using the SortRole.
+    Rows that are appended to the source model are inserted at their sorted position.
+    """
+
+    def __init__(self, parent: Optional[QtCore.QObject] = None):
+        super(SidSortProxyModel, self).__init__(parent)
+        self.setSortRole(SortRole)
+        self.setDynamicSortFilter(True)
@@ -15,10 +15,32 @@ browser_title = ""
 get_action_handler = None
 table_bloc_columns = []
 table_bloc_functions = []
+table_bloc_formatters = []
 extension_filters = []
 search_reset_keys = []
 basetype_to_cut = {}
 basetype_clipped_versions = []
+bar_completion_delay = 150
+sid_index_path = None
+profile = False
+profile_path = None
+
+defaults = [
+    'is_leaf',
+    'browser_title',
+    'get_action_handler',
+    'table_bloc_columns',
+    'table_bloc_functions',
+    'table_bloc_formatters',
+    'extension_filters',
+    'search_reset_keys',
+    'basetype_to_cut',
+    'basetype_clipped_versions',
+    'bar_completion_delay',
+    'sid_index_path',
+    'profile',
+    'profile_path',
+]
 
 
 try:
@@ -29,13 +51,15 @@ except ModuleNotFoundError as e:
     print(problem)
     raise Exception(problem)
 
-__all__ = []
+# the defaults are exported too, for configurations that do not define the newer keys
+__all__ = list(defaults)
 for name, value in inspect.getmembers(module):
     if name.startswith('__'):
         continue
 
     globals()[name] = value
-    __all__.append(name)
+    if name not in __all__:
+        __all__.append(name)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,10 @@
+# -*- coding: utf-8 -*-
+"""
+This file is part of spil_ui, a UI using SPIL, The Simple Pipeline Lib.
+
+(C) copyright 2019-2024 Michael Haussmann, spil@xeo.info
+
+SPIL is free software and is distributed under the MIT License. See LICENCE file.
+"""
+from spil_ui.engine.search_engine import SearchEngine
+from spil_ui.engine.search_engine import edit_search, entity_columns, versions_search
@@ -0,0 +1,373 @@
+"""
+This file is part of spil_ui, a UI using SPIL, The Simple Pipeline Lib.
+
+(C) copyright 2019-2024 Michael Haussmann, spil@xeo.info
+
+SPIL_UI is free software and is distributed under the MIT License. See LICENSE file.
+"""
+from __future__ import annotations
+from typing import Any, AsyncIterator, Callable, Iterable, List, Optional, Tuple
+
+"""
+The search cycle of the Browser, without UI.
+
+A search Sid is shown as entity columns (project, type, asset, ...) and a version table.
+The functions of this module compose the searches of the cycle:
+- edit_search: adds search criteria to a selected Sid ("/*")
+- entity_columns: the entity column searches, up to the "cut" key (see basetype_to_cut)
+- versions_search: the version table search, with extension filters, "last" and state queries
+
+The Qt Browser uses these functions, and runs the searches with its SearchExecutors.
+
+The SearchEngine runs the same searches with asyncio, for headless tools:
+Finder searches run in a thread pool executor, and results are yielded by async iterators.
+
+Example:
+    engine = SearchEngine()
+    search = edit_search(get_sid("hamlet/a/char/ophelia"))
+    async for key, items in engine.columns(search):
+        print(key, items)
+    async for sids in engine.versions(search, last=True):
+        print(sids)
+"""
+from concurrent.futures import Executor, ThreadPoolExecutor
+import asyncio
+import threading
+
+from spil import FindInAll as Finder
+from spil import Sid
+from spil import logging
+from spil import conf
+
+from spil_ui.conf import is_leaf, basetype_to_cut, basetype_clipped_versions
+from spil_ui.util.cache import TTLCache, MISSING
+from spil_ui.util.instrument import profiler
+from spil_ui.util.sid_pool import get_sid
+
+log = logging.get_logger(name="spil_ui")
+
+Column = Tuple[str, Sid]  # key, column search
+Resolve = Callable[[Any, Any], Any]  # (tag, result) -> item or None
+
+
+def edit_search(search_sid: Sid) -> Sid:
+    """
+    If the search has no searchers ("*", ",", ...) it needs edit.
+    """
+    # we check this first, because the Sid might not be typed.
+    if search_sid.is_search():
+        return search_sid
+
+    if is_leaf(search_sid):
+        return search_sid
+
+    return get_sid(str(search_sid) + "/*")
+
+
+def cut_key(search: Sid) -> str:
+    """
+    Returns the key that separates the entity columns and the version table, for the search basetype.
+    """
+    return basetype_to_cut.get(search.basetype, "task")
+
+
+def entities_search(search: Sid) -> Sid:
+    """
+    Returns the part of the search that is shown in entity columns (without "/**").
+    """
+    if "/**" in search.string:
+        return get_sid(search.string.split("/**")[0])
+    return search.copy()
+
+
+def column_search(search: Sid, key: str) -> Sid:
+    """
+    Returns the search that lists the entity column of the given key.
+    """
+    return search.get_as(key).get_with(key=key, value="*")
+
+
+def entity_columns(search: Sid) -> Tuple[List[Column], bool]:
+    """
+    Returns the entity columns of the search, as (key, column search) tuples,
+    and True if the version table follows the columns.
+
+    The columns follow the parts of the search, and stop either:
+    - when there are no parts left (eg "hamlet/s/sq010" has 3 parts)
+    - at a search symbol (eg. "hamlet/s/*")
+    - when it hits a "cut" key (as configured in "basetype_to_cut")
+
+    The version table follows if "/**" is in the search, or if the cut key was hit.
+    """
+    versions = "/**" in search.string
+    search = entities_search(search)
+
+    columns = []
+    for key in search.fields.keys():
+        columns.append((key, column_search(search, key)))
+
+        if search.get(key) in conf.search_symbols:
+            break
+
+        if key == cut_key(search):
+            versions = True
+            break
+
+    return columns, versions
+
+
+def versions_search(
+    search: Sid,
+    extensions: Iterable[str] = (),
+    last: bool = False,
+    work: bool = False,
+    publish: bool = False,
+) -> Optional[Tuple[str, str]]:
+    """
+    Returns the search of the version table, or None if there is nothing to search.
+
+    The search keeps the global search, but changes fields for version, state and extension.
+
+    Args:
+        search: the current search Sid
+        extensions: extension filters (eg. ["maya", "movie"])
+        last: if True, only the last versions are searched
+        work: if True, "work" state versions are searched
+        publish: if True, "publish" state versions are searched
+
+    Returns:
+        tuple: the search to show to the user (without the last and state queries), and the final search
+    """
+    if search:  # Untyped evaluates to False.
+
+        if "/**" in search.string:
+            result = search.string
+        else:
+            key = cut_key(search)
+            if search.get_as(key):
+                result = search.get_as(key).string + "/**"
+            else:
+                result = None
+
+    else:
+
+        result = search.string
+
+    if not result:
+        return None
+
+    extensions = list(extensions)
+    if "/**" in result and extensions:
+
+        # sid contains query ending. We put it aside, and later append it back
+        if result.count("?"):
+            result, query = result.split("?", 1)
+        else:
+            query = ""
+
+        result = (
+            result.split("/**")[0]
+            + "/**/"
+            + ",".join(extensions)
+            + ("?" + query if query else "")
+        )
+
+    shown = result
+
+    # FIXME: hard coded -> config
+    result = result + ("?version=>" if last else "")
+    if work and publish:
+        result = result + ('?state=~w,p')
+    else:
+        result = result + ('?state=~w' if work else "")
+        result = result + ('?state=~p' if publish else "")
+    if search.basetype in basetype_clipped_versions and not extensions:
+        result = result.replace("**", "*")
+
+    return shown, result
+
+
+def entity_item(key: str, found: str) -> Optional[Tuple[str, str]]:
+    """
+    Resolves a found Sid string for the entity column of the given key.
+    Runs in the search thread: each result is parsed once, the caller only receives strings.
+
+    Returns:
+        tuple: the Sid string as the column key, and its label (the value of the key),
+        or None for an erroneous Sid.
+    """
+    sid = get_sid(found)
+    entity = sid.get_as(key)
+    # TODO: move this double check as option in the search
+    if not entity:  # erroneous Sid
+        return None
+    return entity.string, sid.get(key)
+
+
+def collect(
+    search: Any,
+    as_sid: bool = False,
+    tag: Any = None,
+    cache: Optional[TTLCache] = None,
+    resolve: Optional[Resolve] = None,
+    cancelled: Optional[threading.Event] = None,
+) -> Optional[List[Any]]:
+    """
+    Returns all (resolved) results of the search (blocking), from the cache or the Finder.
+    Used by the SearchEngine and by the Browser's SearchExecutors.
+
+    Args:
+        search: the search Sid (or string)
+        as_sid: Finder argument, if True results are Sids, else strings
+        tag: passed to the resolve function (eg. the key of an entity column)
+        cache: if given, results are cached by (search string, as_sid)
+        resolve: if given, resolves each result in the current thread, results resolved to None are dropped
+        cancelled: if given and set during the search, the search stops
+
+    Returns:
+        the list of results, or None if the search was cancelled
+    """
+    key = (str(search), as_sid)
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not MISSING:
+            return cached
+
+    if cancelled is not None and cancelled.is_set():  # cancelled while queued
+        return None
+    results = []
+    with profiler.phase("find"):
+        for result in Finder().find(search, as_sid=as_sid):
+            if cancelled is not None and cancelled.is_set():
+                return None
+            if resolve:
+                result = resolve(tag, result)
+                if result is None:
+                    continue
+            results.append(result)
+    if cache is not None:
+        cache.put(key, results)
+    return results
+
+
+class SearchEngine(object):
+    """
+    Runs the searches of a search cycle with asyncio.
+
+    Finder searches run in the given executor (by default a private thread pool),
+    the event loop is never blocked.
+
+    If a cache is given, entity column listings are cached by column search
+    (it can be shared with the Browser's entity SearchExecutor).
+
+    Example (the cache answers the column listings):
+        >>> cache = TTLCache()
+        >>> search = edit_search(get_sid("hamlet/a/char"))
+        >>> for key, column in entity_columns(search)[0]:
+        ...     cache.put((str(column), False), [(str(column).replace("*", key), key)])
+        >>> async def listing(engine):
+        ...     return [(key, items) async for key, items in engine.columns(search)]
+        >>> asyncio.run(listing(SearchEngine(cache=cache)))[-1]
+        ('asset', [('hamlet/a/char/asset', 'asset')])
+    """
+
+    done = object()  # end of a search, in the result queue
+
+    def __init__(
+        self,
+        executor: Optional[Executor] = None,
+        cache: Optional[TTLCache] = None,
+        batch_size: int = 100,
+    ):
+        self.executor = executor or ThreadPoolExecutor(thread_name_prefix="spil_ui_engine")
+        self.cache = cache
+        self.batch_size = batch_size
+
+    def list_column(self, key: str, search: Sid) -> List[Tuple[str, str]]:
+        """
+        Lists an entity column (blocking), as (sid string, label) items, sorted.
+        """
+        return sorted(collect(search, tag=key, cache=self.cache, resolve=entity_item))
+
+    async def columns(self, search: Sid) -> AsyncIterator[Tuple[str, List[Tuple[str, str]]]]:
+        """
+        Yields the entity columns of the search, in order, as (key, items) tuples.
+        Items are (sid string, label) tuples.
+
+        All columns are listed concurrently, each is yielded once it and the previous ones are listed.
+        """
+        loop = asyncio.get_running_loop()
+        columns, _ = entity_columns(search)
+        futures = [
+            loop.run_in_executor(self.executor, self.list_column, key, column)
+            for key, column in columns
+        ]
+        try:
+            for (key, _), future in zip(columns, futures):
+                yield key, await future
+        finally:
+            for future in futures:
+                future.cancel()
+
+    async def versions(
+        self,
+        search: Sid,
+        extensions: Iterable[str] = (),
+        last: bool = False,
+        work: bool = False,
+        publish: bool = False,
+    ) -> AsyncIterator[List[str]]:
+        """
+        Yields the Sid strings of the version table, by batches, as they are found.
+        See versions_search for the arguments.
+
+        The version table is only listed if the search goes beyond the entity columns.
+        """
+        _, versions = entity_columns(search)
+        searches = versions_search(search, extensions, last, work, publish) if versions else None
+        if not searches:
+            return
+        async for batch in self.find(searches[1]):
+            yield batch
+
+    async def find(self, search: Any, as_sid: bool = False) -> AsyncIterator[List[Any]]:
+        """
+        Runs a Finder search in the executor, and yields its results by batches, as they are found.
+        Closing the iterator stops the search.
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        cancelled = threading.Event()
+
+        def put(item):
+            loop.call_soon_threadsafe(queue.put_nowait, item)
+
+        def produce():
+            batch = []
+            try:
+                for result in Finder().find(search, as_sid=as_sid):
+                    if cancelled.is_set():
+                        return
+                    batch.append(result)
+                    if len(batch) >= self.batch_size:
+                        put(batch)
+                        batch = []
+                if batch:
+                    put(batch)
+            except Exception as ex:
+                log.error(f'Search failed for "{search}": {ex}')
+                put(ex)
+            finally:
+                put(self.done)
+
+        loop.run_in_executor(self.executor, produce)
+        try:
+            while True:
+                item = await queue.get()
+                if item is self.done:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            cancelled.set()
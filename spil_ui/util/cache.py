@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""
+This file is part of spil_ui, a UI using SPIL, The Simple Pipeline Lib.
+
+(C) copyright 2019-2024 Michael Haussmann, spil@xeo.info
+
+SPIL is free software and is distributed under the MIT License. See LICENCE file.
+
+A bounded cache with time-to-live, for long running UI sessions.
+
+Entries expire after "ttl" seconds, and the least recently used entries
+are dropped when the cache holds more than "maxsize" entries.
+"""
+from __future__ import annotations
+from typing import Any, Hashable, Optional
+from collections import OrderedDict
+import threading
+import time
+
+MISSING = object()  # returned by get() for missing or expired keys
+
+
+class TTLCache(object):
+    """
+    Thread safe LRU cache, with a time-to-live per entry.
+
+    Example:
+        >>> cache = TTLCache(maxsize=2, ttl=60)
+        >>> cache.put("a", 1)
+        >>> cache.put("b", 2)
+        >>> cache.put("c", 3)
+        >>> cache.get("a") is MISSING, cache.get("c")
+        (True, 3)
+        >>> len(cache)
+        2
+    """
+
+    def __init__(self, maxsize: int = 10000, ttl: Optional[float] = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.data: OrderedDict = OrderedDict()  # key: (timestamp, value)
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = MISSING) -> Any:
+        """
+        Returns the value for the given key, or default if the key is missing or expired.
+        """
+        with self.lock:
+            entry = self.data.get(key)
+            if entry is not None:
+                timestamp, value = entry
+                if self.ttl is None or time.monotonic() - timestamp < self.ttl:
+                    self.data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self.data[key]
+            self.misses += 1
+            return default
+
+    def put(self, key: Hashable, value: Any) -> None:
+        with self.lock:
+            self.data[key] = (time.monotonic(), value)
+            self.data.move_to_end(key)
+            while len(self.data) > self.maxsize:
+                self.data.popitem(last=False)
+
+    def update(self, values: dict) -> None:
+        for key, value in values.items():
+            self.put(key, value)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self.lock:
+            entry = self.data.pop(key, None)
+        return entry[1] if entry is not None else default
+
+    def clear(self) -> None:
+        with self.lock:
+            self.data.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key) is not MISSING
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __str__(self):
+        return f"{self.__class__.__name__}({len(self)}/{self.maxsize}, ttl={self.ttl}, hits={self.hits}, misses={self.misses})"
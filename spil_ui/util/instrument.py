@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+"""
+This file is part of spil_ui, a UI using SPIL, The Simple Pipeline Lib.
+
+(C) copyright 2019-2024 Michael Haussmann, spil@xeo.info
+
+SPIL is free software and is distributed under the MIT License. See LICENCE file.
+
+Opt-in timing of the UI hot paths.
+
+The phases of the search cycle (launch_search, boot_entities, build_entities, build_versions,
+the action handler update), the Finder searches, Sid parsing and the table_bloc_functions
+are timed, and aggregated in histograms, by phase name.
+
+Profiling is off by default. It is enabled by the environment variable SPIL_UI_PROFILE=1,
+or by "profile = True" in the spil_qtui_conf.
+When enabled, the Browser shows a summary in its status bar,
+and the histograms are written as JSON when a window is closed ("profile_path" in the spil_qtui_conf).
+
+When disabled, a phase costs a method call.
+"""
+from __future__ import annotations
+from typing import Any, Callable, Dict, List, Optional
+import bisect
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+
+env_variable = "SPIL_UI_PROFILE"
+
+
+class Histogram(object):
+    """
+    Durations of a phase, in milliseconds, counted in fixed buckets.
+
+    Example:
+        >>> histogram = Histogram()
+        >>> for ms in (0.3, 4, 4, 30):
+        ...     histogram.add(ms)
+        >>> histogram.count, histogram.max
+        (4, 30)
+        >>> histogram.percentile(50), histogram.percentile(95)
+        (5, 50)
+    """
+
+    bounds = (0.1, 0.2, 0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)  # upper bounds
+
+    def __init__(self):
+        self.counts = [0] * (len(self.bounds) + 1)  # the last bucket is above the last bound
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, ms: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, ms)] += 1
+        self.count += 1
+        self.total += ms
+        self.max = max(self.max, ms)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, percent: float) -> float:
+        """
+        Returns the upper bound of the bucket containing the given percentile (the max for the last bucket).
+        """
+        rank = self.count * percent / 100.0
+        cumulated = 0
+        for bound, count in zip(self.bounds, self.counts):
+            cumulated += count
+            if count and cumulated >= rank:
+                return bound
+        return self.max
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "total_ms": round(self.total, 3),
+            "mean_ms": round(self.mean, 3),
+            "max_ms": round(self.max, 3),
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "buckets": {
+                f"<={bound}" if i < len(self.bounds) else f">{self.bounds[-1]}": count
+                for i, (bound, count) in enumerate(zip(self.bounds + (None,), self.counts))
+                if count
+            },
+        }
+
+
+class PhaseTimer(object):
+    """
+    Times a phase, as a context manager.
+    """
+
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler: Profiler, name: str):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *args):
+        self.profiler.record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class Profiler(object):
+    """
+    Aggregates the durations of named phases, from any thread.
+
+    Example:
+        >>> profiler = Profiler(enabled=True)
+        >>> with profiler.phase("build"):
+        ...     pass
+        >>> profiler.histograms["build"].count
+        1
+        >>> Profiler(enabled=False).phase("build").__class__.__name__
+        'nullcontext'
+    """
+
+    def __init__(self, enabled: Optional[bool] = None):
+        self._enabled = enabled  # None: read from the environment and the configuration, on first use
+        self.histograms: Dict[str, Histogram] = {}
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.null = contextlib.nullcontext()
+
+    @property
+    def enabled(self) -> bool:
+        if self._enabled is None:
+            self._enabled = is_enabled()
+        return self._enabled
+
+    def phase(self, name: str):
+        """
+        Returns a context manager timing the given phase (a no-op if profiling is disabled).
+        """
+        if not self.enabled:
+            return self.null
+        return PhaseTimer(self, name)
+
+    def timed(self, name: Optional[str] = None) -> Callable:
+        """
+        Decorator timing each call of the function, as the given phase (default: the function name).
+        """
+
+        def decorator(func):
+            phase = name or func.__name__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.phase(phase):
+                    return func(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def record(self, name: str, seconds: float) -> None:
+        with self.lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.add(seconds * 1000)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.histograms = {}
+            self.started = time.time()
+
+    def summary(self, names: Optional[List[str]] = None) -> str:
+        """
+        Returns a one line summary: mean and 95th percentile (in milliseconds) by phase.
+        """
+        with self.lock:
+            names = names or sorted(self.histograms)
+            parts = []
+            for name in names:
+                histogram = self.histograms.get(name)
+                if histogram:
+                    parts.append(
+                        f"{name} {histogram.mean:.1f}ms (p95 {histogram.percentile(95):g}, n={histogram.count})"
+                    )
+        return " | ".join(parts)
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                "started": self.started,
+                "ended": time.time(),
+                "phases": {name: histogram.to_dict() for name, histogram in self.histograms.items()},
+            }
+
+    def dump(self, path: Optional[str] = None) -> Optional[str]:
+        """
+        Writes the histograms as JSON, to the given path, or the configured "profile_path".
+
+        Returns:
+            the path of the written file, or None if there is nothing to write
+        """
+        if not self.histograms:
+            return None
+        if not path:
+            from spil_ui import conf  # fmt: skip
+            path = getattr(conf, "profile_path", None) or default_path()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+        return path
+
+
+def default_path() -> str:
+    return os.path.join(os.path.expanduser("~"), ".spil_ui", "profile.json")
+
+
+def is_enabled() -> bool:
+    """
+    Profiling is enabled by the SPIL_UI_PROFILE environment variable (1 / 0),
+    or else by "profile" in the spil_qtui_conf.
+    """
+    value = os.environ.get(env_variable, "")
+    if value:
+        return value.lower() not in ("0", "false", "no", "off")
+    from spil_ui import conf  # fmt: skip
+    return bool(getattr(conf, "profile", False))
+
+
+profiler = Profiler()
@@ -0,0 +1,307 @@
+# -*- coding: utf-8 -*-
+"""
+This file is part of spil_ui, a UI using SPIL, The Simple Pipeline Lib.
+
+(C) copyright 2019-2024 Michael Haussmann, spil@xeo.info
+
+SPIL is free software and is distributed under the MIT License. See LICENCE file.
+
+A persistent local index of Sid strings, for substring search.
+
+The index is an SQLite database, filled with the Sids found by Finder searches.
+The Bar adds the Sids found by its completion searches, and queries the index
+with space separated terms, eg. "oph rig" finds "hamlet/a/char/ophelia/rig/...".
+
+If SQLite supports it, a FTS5 table with the "trigram" tokenizer is used (SQLite 3.34+),
+else the index falls back to a LIKE search on the Sid table.
+
+Searches use their own connection, and the database is in WAL mode if possible,
+so a search (in the Qt main thread) does not wait for the writer thread.
+Writes are committed by chunks, so even without WAL a search waits at most for one chunk.
+
+The index can be (re)built from the command line:
+    python -m spil_ui.util.sid_index "hamlet/**"
+"""
+from __future__ import annotations
+from typing import Iterable, List, Optional
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+from spil import FindInAll as Finder
+from spil import logging
+
+log = logging.get_logger(name="spil_ui")
+
+end = "\uffff"  # sorts after any character used in Sid strings
+chunk_size = 1000  # Sids written per transaction
+search_timeout = 0.1  # seconds a search waits for a locked database, before it returns no result
+
+schema = """
+CREATE TABLE IF NOT EXISTS sids (sid TEXT PRIMARY KEY, updated REAL);
+"""
+
+fts_schema = """
+CREATE VIRTUAL TABLE IF NOT EXISTS sids_fts USING fts5(
+    sid, content='sids', content_rowid='rowid', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS sids_insert AFTER INSERT ON sids BEGIN
+    INSERT INTO sids_fts(rowid, sid) VALUES (new.rowid, new.sid);
+END;
+CREATE TRIGGER IF NOT EXISTS sids_delete AFTER DELETE ON sids BEGIN
+    INSERT INTO sids_fts(sids_fts, rowid, sid) VALUES ('delete', old.rowid, old.sid);
+END;
+"""
+
+
+def default_path() -> str:
+    return os.path.join(os.path.expanduser("~"), ".spil_ui", "sid_index.db")
+
+
+def like_pattern(term: str) -> str:
+    """
+    Returns a LIKE pattern matching the term as a substring.
+
+    Example:
+        >>> like_pattern("v_01%")
+        '%v\\\\_01\\\\%%'
+    """
+    term = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{term}%"
+
+
+class SidIndex(object):
+    """
+    Persistent index of Sid strings, with substring search.
+
+    Example:
+        >>> index = SidIndex(":memory:")
+        >>> index.add(["hamlet/a/char/ophelia/rig", "hamlet/a/char/ophelia/model", "hamlet/a/prop/skull/rig"])
+        >>> index.search("oph rig")
+        ['hamlet/a/char/ophelia/rig']
+        >>> index.search("RIG")
+        ['hamlet/a/prop/skull/rig', 'hamlet/a/char/ophelia/rig']
+        >>> index.add_later(["hamlet/a/prop/crown/rig"])
+        >>> index.flush()
+        >>> len(index)
+        4
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or default_path()
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.connection = sqlite3.connect(self.path, check_same_thread=False)
+        self.lock = threading.Lock()
+        self.pending: queue.Queue = queue.Queue()  # batches for the writer thread (see add_later)
+        self.writer: Optional[threading.Thread] = None
+        with self.lock, self.connection:
+            self.connection.executescript(schema)
+            try:
+                self.connection.executescript(fts_schema)
+                self.fts = True
+            except sqlite3.OperationalError as ex:
+                log.debug(f"SQLite FTS5 trigram not available ({ex}). Using LIKE search.")
+                self.fts = False
+
+        # searches use their own connection (an in-memory database can not be shared)
+        if self.path == ":memory:":
+            self.reader, self.read_lock = self.connection, self.lock
+        else:
+            try:
+                self.connection.execute("PRAGMA journal_mode=WAL")
+            except sqlite3.Error as ex:
+                log.debug(f"SQLite WAL not available ({ex}).")
+            self.reader = sqlite3.connect(self.path, timeout=search_timeout, check_same_thread=False)
+            self.read_lock = threading.Lock()
+
+    def add(self, sids: Iterable[str], updated: Optional[float] = None) -> None:
+        """
+        Adds the given Sid strings to the index, or updates their timestamp.
+        Sids are committed by chunks (see chunk_size).
+        """
+        updated = updated or time.time()
+        sids = [str(sid) for sid in sids]
+        # no "ON CONFLICT ... DO UPDATE" (upsert), which needs SQLite 3.24+
+        for i in range(0, len(sids), chunk_size):
+            chunk = sids[i : i + chunk_size]
+            with self.lock, self.connection:
+                self.connection.executemany(
+                    "INSERT OR IGNORE INTO sids (sid, updated) VALUES (?, ?)",
+                    ((sid, updated) for sid in chunk),
+                )
+                self.connection.executemany(
+                    "UPDATE sids SET updated = ? WHERE sid = ?",
+                    ((updated, sid) for sid in chunk),
+                )
+
+    def add_later(self, sids: Iterable[str]) -> None:
+        """
+        Adds the given Sid strings to the index, in the writer thread.
+        Used by the UIs: the Qt main thread never waits for the database (which may be on a network drive).
+        Pending batches are written together.
+        """
+        if self.writer is None:
+            self.writer = threading.Thread(target=self.write_pending, name="spil_ui_sid_index", daemon=True)
+            self.writer.start()
+        self.pending.put(list(sids))
+
+    def write_pending(self) -> None:
+        while True:
+            batch = self.pending.get()
+            sids = [] if batch is None else list(batch)
+            done = 1
+            while True:  # drains the pending batches
+                try:
+                    more = self.pending.get_nowait()
+                except queue.Empty:
+                    break
+                done += 1
+                if more is None:
+                    batch = None
+                else:
+                    sids.extend(more)
+            try:
+                if sids:
+                    self.add(sids)
+            except sqlite3.Error as ex:
+                log.warning(f"Unable to write to the Sid index {self}: {ex}")
+            finally:
+                for _ in range(done):
+                    self.pending.task_done()
+            if batch is None:
+                return
+
+    def flush(self) -> None:
+        """
+        Waits until the pending batches are written.
+        """
+        if self.writer is not None:
+            self.pending.join()
+
+    def remove_older(self, prefix: str, updated: float) -> None:
+        """
+        Removes the Sid strings starting with prefix, that were not updated since the given time.
+        """
+        with self.lock, self.connection:
+            self.connection.execute(
+                "DELETE FROM sids WHERE sid >= ? AND sid < ? AND updated < ?",
+                (prefix, prefix + end, updated),
+            )
+
+    def index(self, search: str) -> int:
+        """
+        Runs the given search with the Finder, and adds the results to the index.
+        For a "**" search, Sids below the search that were not found anymore are removed,
+        so the index can be refreshed incrementally, branch by branch.
+
+        Returns:
+            the number of found Sids
+        """
+        started = time.time()
+        count = 0
+        batch = []
+        for found in Finder().find(search, as_sid=False):
+            batch.append(found)
+            if len(batch) >= 1000:
+                self.add(batch, started)
+                count += len(batch)
+                batch = []
+        self.add(batch, started)
+        count += len(batch)
+
+        search = str(search)
+        if search.endswith("**"):
+            self.remove_older(search.rstrip("*"), started)
+        log.debug(f'Indexed {count} Sids for "{search}"')
+        return count
+
+    def search(self, text: str, limit: int = 50, candidates: int = 1000) -> List[str]:
+        """
+        Returns the Sid strings containing all space separated terms of the text (case insensitive).
+
+        At most "candidates" matches are read, and ranked: shortest Sids come first.
+        This keeps broad searches (eg. "ma") fast on large indexes.
+        """
+        terms = text.split()
+        if not terms:
+            return []
+
+        conditions = []
+        parameters = []
+        if self.fts:
+            table = "sids_fts"
+            long_terms = [term for term in terms if len(term) >= 3]  # trigrams
+            if long_terms:
+                conditions.append("sids_fts MATCH ?")
+                parameters.append(
+                    " AND ".join('"{}"'.format(term.replace('"', '""')) for term in long_terms)
+                )
+            terms = [term for term in terms if len(term) < 3]
+        else:
+            table = "sids"
+        for term in terms:
+            conditions.append("sid LIKE ? ESCAPE '\\'")
+            parameters.append(like_pattern(term))
+
+        query = f"SELECT sid FROM {table} WHERE {' AND '.join(conditions)} LIMIT ?"
+        try:
+            with self.read_lock:
+                rows = self.reader.execute(query, parameters + [candidates]).fetchall()
+        except sqlite3.OperationalError as ex:  # eg. locked by a writer
+            log.debug(f'Sid index search failed for "{text}": {ex}')
+            return []
+        return sorted((row[0] for row in rows), key=lambda sid: (len(sid), sid))[:limit]
+
+    def clear(self) -> None:
+        with self.lock, self.connection:
+            self.connection.execute("DELETE FROM sids")
+
+    def close(self) -> None:
+        if self.writer is not None:
+            self.pending.put(None)  # stops the writer, once the pending batches are written
+            self.writer.join()
+            self.writer = None
+        if self.reader is not self.connection:
+            self.reader.close()
+        self.connection.close()
+
+    def __len__(self) -> int:
+        with self.lock:
+            return self.connection.execute("SELECT count(*) FROM sids").fetchone()[0]
+
+    def __str__(self):
+        return f'{self.__class__.__name__}("{self.path}", fts={self.fts})'
+
+
+_sid_index = None
+
+
+def get_sid_index() -> Optional[SidIndex]:
+    """
+    Returns the shared SidIndex, opened on first call.
+    The path is given by "sid_index_path" in the spil_qtui_conf (default in the user's home).
+    Returns None if the index can not be opened.
+    """
+    global _sid_index
+    if _sid_index is None:
+        from spil_ui import conf  # fmt: skip
+        sid_index_path = getattr(conf, "sid_index_path", None)
+        try:
+            _sid_index = SidIndex(sid_index_path)
+        except (OSError, sqlite3.Error) as ex:
+            log.warning(f'Unable to open the Sid index "{sid_index_path}": {ex}')
+            return None
+    return _sid_index
+
+
+if __name__ == "__main__":
+
+    import sys
+
+    index = get_sid_index()
+    for search in sys.argv[1:]:
+        print(f'{search}: {index.index(search)} Sids')
+    print(f"{index}: {len(index)} Sids")
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""
+This file is part of spil_ui, a UI using SPIL, The Simple Pipeline Lib.
+
+(C) copyright 2019-2024 Michael Haussmann, spil@xeo.info
+
+SPIL is free software and is distributed under the MIT License. See LICENCE file.
+
+A shared pool of resolved Sids, for the UIs.
+
+The Browser, the Bar and the action handlers create the same Sids over and over,
+from the same strings (searches, selections, found results, typed text).
+The pool maps each string to a single resolved Sid object, so each string is parsed once.
+
+Pooled Sids are shared: they must not be modified.
+"""
+from __future__ import annotations
+from typing import Optional
+
+from spil import Sid
+from spil_ui.util.cache import TTLCache, MISSING
+from spil_ui.util.instrument import profiler
+
+
+class SidPool(object):
+    """
+    Interns Sids by string, with LRU eviction.
+
+    Example:
+        >>> pool = SidPool(maxsize=10)
+        >>> pool.get("hamlet") is pool.get("hamlet")
+        True
+        >>> pool.hits, pool.misses
+        (1, 1)
+    """
+
+    def __init__(self, maxsize: int = 20000):
+        self.sids = TTLCache(maxsize=maxsize, ttl=None)  # string: Sid
+
+    def get(self, sid: Optional[Sid | str]) -> Sid:
+        """
+        Returns the pooled Sid for the given string.
+        A Sid instance is returned as is.
+        """
+        if isinstance(sid, Sid):
+            return sid
+        if sid is None:
+            return Sid()
+
+        found = self.sids.get(sid)
+        if found is MISSING:
+            with profiler.phase("sid_parse"):
+                found = Sid(sid)
+            self.sids.put(sid, found)
+        return found
+
+    @property
+    def hits(self) -> int:
+        return self.sids.hits
+
+    @property
+    def misses(self) -> int:
+        return self.sids.misses
+
+    def clear(self) -> None:
+        self.sids.clear()
+
+    def __len__(self) -> int:
+        return len(self.sids)
+
+    def __str__(self):
+        return f"{self.__class__.__name__}({len(self)}/{self.sids.maxsize}, hits={self.hits}, misses={self.misses})"
+
+
+sid_pool = SidPool()
+
+
+def get_sid(sid: Optional[Sid | str]) -> Sid:
+    """
+    Returns the shared, resolved Sid for the given string (see SidPool).
+    """
+    return sid_pool.get(sid)
@@ -0,0 +1,287 @@
+# -*- coding: utf-8 -*-
+"""
+This file is part of spil_ui, a UI using SPIL, The Simple Pipeline Lib.
+
+(C) copyright 2019-2024 Michael Haussmann, spil@xeo.info
+
+SPIL is free software and is distributed under the MIT License. See LICENCE file.
+
+Shared file metadata for the Browser's version table.
+
+The table_bloc_functions (eg. size and time) all need the stat of the Sid's file.
+The StatCache resolves each Sid's path once, does a single os.stat,
+and shares the result between all functions of the row.
+
+Rows are stat by batch: the Sids are grouped by parent directory,
+and each directory is read once with os.scandir, in a thread pool across directories.
+
+Stats are kept in a bounded cache with time-to-live, and invalidated when their directory changes,
+so repeated browsing hits the cache, while added, removed or replaced files show up.
+A directory mtime is checked at most once per "revalidate" seconds.
+"""
+from __future__ import annotations
+from typing import Dict, Iterable, List, Optional, Tuple
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+import os
+import time
+
+from spil import Sid
+from spil_ui.util.cache import TTLCache, MISSING
+from spil_ui.util.sid_pool import get_sid
+
+Entry = Tuple[Optional[os.stat_result], Optional[str], Optional[float]]  # stat result, directory, directory mtime
+
+
+class StatCache(object):
+    """
+    Caches one os.stat result per Sid string.
+    A Sid without path is cached as None.
+    Missing files are not cached (eg. is_file is checked again once the file is saved).
+
+    The cache is bounded, and entries are invalidated:
+    - when they are older than "ttl" seconds,
+    - when the mtime of their directory is not the one it had when they were stat.
+      The directory mtime is checked at most once per "revalidate" seconds by directory.
+    - on clear() (eg. the Browser's "Refresh").
+
+    The directory mtime changes when a file is added, removed or renamed
+    (which includes the applications that save to a temporary file, then rename it).
+    It does not change when a file is written in place: such a change shows after "ttl" seconds, or on clear().
+
+    The cache is thread safe, it is filled from the table's worker threads.
+
+    Example (a file saved to a temporary file, then renamed):
+        >>> import tempfile
+        >>> directory = tempfile.mkdtemp()
+        >>> paths = {name: os.path.join(directory, name) for name in ("a", "b")}
+        >>> for path in paths.values():
+        ...     with open(path, "w") as f:
+        ...         _ = f.write("1")
+        >>> os.utime(directory, (0, 0))  # the directory was last changed long ago
+        >>> cache = StatCache(revalidate=0)
+        >>> cache.prefetch_paths(paths)
+        >>> cache.stat_path("b", paths["b"]).st_size
+        1
+        >>> with open(paths["b"] + ".tmp", "w") as f:
+        ...     _ = f.write("22")
+        >>> os.replace(paths["b"] + ".tmp", paths["b"])
+        >>> cache.prefetch_paths({"a": paths["a"]})  # stat again, with the new directory mtime
+        >>> cache.stat_path("a", paths["a"]).st_size
+        1
+        >>> cache.stat_path("b", paths["b"]).st_size
+        2
+    """
+
+    def __init__(self, maxsize: int = 50000, ttl: Optional[float] = 60.0, revalidate: float = 2.0):
+        self.stats = TTLCache(maxsize=maxsize, ttl=ttl)  # sid string: (stat, directory, directory mtime)
+        self.directories = TTLCache(maxsize=maxsize, ttl=ttl)  # directory: (mtime, time of the last check)
+        self.revalidate = revalidate
+
+    def stat(self, sid: Sid | str) -> Optional[os.stat_result]:
+        """
+        Returns the stat result of the Sid's path, or None.
+        The stat is done only once per Sid, until the entry is invalidated.
+        """
+        key = str(sid)
+        entry = self.stats.get(key)
+        if entry is not MISSING and self.is_fresh(entry):
+            return entry[0]
+        path = get_sid(sid).path()
+        return self.stat_path(key, os.fspath(path) if path else None)
+
+    def stat_path(self, key: str, path: Optional[str]) -> Optional[os.stat_result]:
+        """
+        Returns the stat result of the given path, cached by key (the Sid string), or None.
+        """
+        entry = self.stats.get(key)
+        if entry is not MISSING and self.is_fresh(entry):
+            return entry[0]
+
+        if not path:
+            self.stats.put(key, (None, None, None))
+            return None
+        directory = os.path.dirname(path)
+        mtime = self.directory_mtime(directory)  # before the file stat: a later change invalidates the entry
+        try:
+            result = os.stat(path)
+        except OSError:
+            self.stats.pop(key)
+            return None
+        if mtime is not None:
+            self.stats.put(key, (result, directory, mtime))
+        return result
+
+    def prefetch(self, sids: Iterable[Sid | str]) -> None:
+        """
+        Batch stage: stats all given Sids, before the table functions use them.
+        """
+        paths = {}
+        for sid in sids:
+            key = str(sid)
+            entry = self.stats.get(key)
+            if entry is not MISSING and self.is_fresh(entry):
+                continue
+            path = get_sid(sid).path()
+            paths[key] = os.fspath(path) if path else None
+        self.prefetch_paths(paths)
+
+    def prefetch_paths(self, paths: Dict[str, Optional[str]]) -> None:
+        """
+        Stats the given paths, by key (the Sid string).
+
+        Cached entries are kept if their directory did not change since they were stat (one stat per directory).
+        Other paths are collected by directory (see collect).
+        """
+        missing = {}
+        for key, path in paths.items():
+            entry = self.stats.get(key)
+            if entry is MISSING or not self.is_fresh(entry):
+                missing[key] = path
+        if not missing:
+            return
+
+        results, mtimes = collect(missing)
+        for key, entry in results.items():
+            if entry[0] is None and entry[1]:  # missing file
+                self.stats.pop(key)
+            else:
+                self.stats.put(key, entry)
+        checked = time.monotonic()
+        self.directories.update({directory: (mtime, checked) for directory, mtime in mtimes.items()})
+
+    def is_fresh(self, entry: Entry) -> bool:
+        """
+        Returns True if the directory of the entry still has the mtime it had when the entry was stat.
+        """
+        _, directory, mtime = entry
+        if not directory:
+            return True
+        return mtime is not None and self.directory_mtime(directory) == mtime
+
+    def directory_mtime(self, directory: str) -> Optional[float]:
+        """
+        Returns the current mtime of the directory, or None if it can not be read.
+        The mtime is read at most once per "revalidate" seconds, in between the recorded mtime is returned.
+        """
+        recorded = self.directories.get(directory)
+        now = time.monotonic()
+        if recorded is not MISSING and now - recorded[1] < self.revalidate:
+            return recorded[0]
+        try:
+            mtime = os.stat(directory).st_mtime
+        except OSError:
+            self.directories.pop(directory)
+            return None
+        self.directories.put(directory, (mtime, now))
+        return mtime
+
+    def clear(self) -> None:
+        self.stats.clear()
+        self.directories.clear()
+
+
+max_workers = 8  # threads reading directories in parallel
+scandir_threshold = 2  # below this number of files in a directory, files are stat one by one
+_executor = None
+
+
+def get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="spil_ui_stat"
+        )
+    return _executor
+
+
+def scan_directory(
+    directory: str, names: Dict[str, List[str]]
+) -> Tuple[Dict[str, Entry], Optional[float]]:
+    """
+    Returns the stat results for the given file names in the given directory.
+    The directory is read once with os.scandir, and the stat of its entries is reused.
+
+    Args:
+        directory: path of the directory
+        names: dictionary of file name to the keys (Sid strings) that point to it
+
+    Returns:
+        tuple: dictionary of key to (stat result or None, directory, directory mtime),
+        and the directory mtime (or None)
+    """
+    try:
+        mtime = os.stat(directory).st_mtime  # before the files: a later change invalidates the entries
+    except OSError:
+        return {key: (None, directory, None) for keys in names.values() for key in keys}, None
+
+    results = {key: (None, directory, mtime) for keys in names.values() for key in keys}
+
+    if len(names) < scandir_threshold:
+        for name, keys in names.items():
+            try:
+                stat = os.stat(os.path.join(directory, name))
+            except OSError:
+                continue
+            results.update({key: (stat, directory, mtime) for key in keys})
+        return results, mtime
+
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                keys = names.get(entry.name)
+                if not keys:
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                results.update({key: (stat, directory, mtime) for key in keys})
+    except OSError:
+        pass
+
+    return results, mtime
+
+
+def collect(
+    paths: Dict[str, Optional[str]],
+) -> Tuple[Dict[str, Entry], Dict[str, float]]:
+    """
+    Stats the given paths (by key, eg. the Sid string), grouped by parent directory.
+    Each directory is read once, directories are read in parallel.
+
+    Returns:
+        tuple: dictionary of key to (stat result or None, directory, directory mtime),
+        and dictionary of directory to mtime.
+    """
+    results: Dict[str, Entry] = {}
+    mtimes: Dict[str, float] = {}
+    directories: Dict[str, Dict[str, List[str]]] = defaultdict(lambda: defaultdict(list))
+
+    for key, path in paths.items():
+        if not path:
+            results[key] = (None, None, None)
+            continue
+        directory, name = os.path.split(path)
+        directories[directory][name].append(key)
+
+    if len(directories) == 1:
+        scans = [scan_directory(*item) for item in directories.items()]
+    else:
+        scans = get_executor().map(scan_directory, directories.keys(), directories.values())
+
+    for directory, (found, mtime) in zip(list(directories.keys()), scans):
+        results.update(found)
+        if mtime is not None:
+            mtimes[directory] = mtime
+    return results, mtimes
+
+
+stat_cache = StatCache()
+
+
+def sid_stat(sid: Sid | str) -> Optional[os.stat_result]:
+    """
+    Returns the shared stat result of the given Sid's file, or None.
+    """
+    return stat_cache.stat(sid)
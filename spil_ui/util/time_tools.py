@@ -6,16 +6,22 @@ Created on 1 fevr. 2012
 
 Some timestamp converting tools.
 
-Uses external lib : parsedatetime (Copyright 2009 Jai Vikram Singh Verma (jaivikram[dot]verma[at]gmail[dot]com), Apache Licence)
+Lapses are formatted like the external lib parsedatetime (spil_ui.util.parsedatetime,
+Copyright 2009 Jai Vikram Singh Verma (jaivikram[dot]verma[at]gmail[dot]com), Apache Licence),
+but computed directly from the timestamps.
 
 @author: michael haussmann
 
 """
 
-from spil_ui.util.parsedatetime import convertToHumanReadable
 import datetime
 import time as to
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 
 def now():
     """ Returns the 'now' timestamp as an int """
@@ -25,8 +31,103 @@ def now():
 def toHumanReadableSecond(timestamp):
     return str(datetime.datetime.fromtimestamp(float( timestamp )).strftime('%Y-%m-%d %H:%M:%S'))
 
-def toHumanReadableLapse(timestamp):
-    return convertToHumanReadable(datetime.datetime.fromtimestamp(float( timestamp )).strftime('%Y-%m-%d %H:%M:%S.%f'))
+def toHumanReadableLapse(timestamp, now=None):
+    """
+    Returns the time elapsed since the given epoch timestamp, eg. "3 days, 2 hours ago".
+    Same output as parsedatetime.convertToHumanReadable, but computed directly from the seconds,
+    without the datetime to string round-trip.
+    """
+    if now is None:
+        now = to.time()
+    return formatLapse(now - float(timestamp))
+
+
+def formatLapse(seconds):
+    """
+    Returns the given duration in seconds, as "X days, Y hours ago".
+    Only the two most significant durations are kept (see parsedatetime).
+
+    >>> formatLapse(90061)
+    '1 day, 1 hour ago'
+    >>> formatLapse(40 * 86400)
+    '1 month, 10 days ago'
+    >>> formatLapse(59)
+    '0 minutes ago'
+    """
+    days, rest = divmod(seconds, 86400)
+    return _lapse(int(days), int(rest // 3600), int(rest % 3600 // 60))
+
+
+def toHumanReadableLapses(timestamps, now=None):
+    """
+    Returns the human-readable lapses of a sequence of epoch timestamps, in one pass.
+    Used to format a full table column at once.
+
+    The lapses are computed as arrays with NumPy when available, else in pure python.
+    Equal lapses (eg. "2 months ago") are formatted only once.
+
+    >>> toHumanReadableLapses([0, 3600, 90000], now=90000)
+    ['1 day, 1 hour ago', '1 day ago', '0 minutes ago']
+    """
+    if now is None:
+        now = to.time()
+
+    if numpy is not None:
+        seconds = now - numpy.asarray(timestamps, dtype=float)
+        days, rest = numpy.divmod(seconds, 86400)
+        hours = numpy.where(days >= 30, 0, rest // 3600)
+        minutes = numpy.where(days >= 1, 0, rest % 3600 // 60)
+        keys = numpy.stack([days, hours, minutes], axis=-1).astype(numpy.int64)
+        if not len(keys):
+            return []
+        unique, inverse = numpy.unique(keys, axis=0, return_inverse=True)
+        labels = [_lapse(int(d), int(h), int(m)) for d, h, m in unique]
+        return [labels[i] for i in inverse.reshape(-1)]
+
+    labels = {}
+    result = []
+    for timestamp in timestamps:
+        days, rest = divmod(now - float(timestamp), 86400)
+        key = _lapse_key(int(days), int(rest // 3600), int(rest % 3600 // 60))
+        label = labels.get(key)
+        if label is None:
+            label = labels[key] = _lapse(*key)
+        result.append(label)
+    return result
+
+
+def _lapse_key(days, hours, minutes):
+    # hours are not shown beyond a month, minutes are not shown beyond a day
+    if days >= 30:
+        return days, 0, 0
+    if days >= 1:
+        return days, hours, 0
+    return days, hours, minutes
+
+
+def _plural(count, unit):
+    return '%d %s%s' % (count, unit, 's' if count != 1 else '')
+
+
+def _lapse(days, hours, minutes):
+    datelets = []
+    years, months, xdays = 0, 0, 0
+    if days >= 365:
+        years = days // 365
+        datelets.append(_plural(years, 'year'))
+        days = days % 365
+    if 30 <= days < 365:
+        months = days // 30
+        datelets.append(_plural(months, 'month'))
+        days = days % 30
+    if not years and 0 < days < 30:
+        xdays = days
+        datelets.append(_plural(xdays, 'day'))
+    if not (months or years) and hours != 0:
+        datelets.append(_plural(hours, 'hour'))
+    if not (xdays or months or years):
+        datelets.append(_plural(minutes, 'minute'))
+    return ', '.join(datelets) + ' ago'
 
 
 '''
@@ -35,9 +136,6 @@ def toHumanReadableLapse(timestamp):
 
 
 
-def toHumanReadableLapse(timestamp):
-    return convertToHumanReadable(datetime.datetime.fromtimestamp(float( timestamp )).strftime('%Y-%m-%d %H:%M:%S.%f')) 
-
 def toHumanReadableDay(timestamp):
     return str(datetime.datetime.fromtimestamp(float( timestamp )).strftime('%Y-%m-%d'))
 